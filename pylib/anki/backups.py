@@ -0,0 +1,159 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Incremental collection backups.
+
+Each backup is a small JSON manifest listing the checksums of the fixed-size
+chunks that make up the collection file. The chunks themselves are stored
+compressed in a shared folder, named after their checksum, so a chunk that
+has not changed since an earlier backup is not written again.
+
+SQLite updates pages in place rather than shifting the rest of the file, so
+fixed-size chunks that are a multiple of the page size deduplicate well
+without needing content-defined (rolling hash) boundaries.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import zlib
+from hashlib import sha1
+from typing import BinaryIO, Iterator, List, Set
+
+BACKUP_EXT = ".colbak"
+BACKUP_RE = re.compile(r"backup-\d{4}-\d{2}-.+\.colbak$")
+# full copies made by older versions
+LEGACY_BACKUP_RE = re.compile(r"backup-\d{4}-\d{2}-.+\.colpkg$")
+# added to the name of backups taken while the collection is open, which
+# are kept separately from the backups taken when it is closed
+PERIODIC_SUFFIX = "-periodic"
+
+
+class BackupStore:
+    # a multiple of the largest SQLite page size
+    chunk_size = 256 * 1024
+
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+        self.chunk_folder = os.path.join(folder, "chunks")
+
+    # Adding
+    ##########################################################################
+
+    def add(self, path: str, name: str) -> str:
+        """Back up the file at path, returning the path of the new manifest.
+
+        The file is read one chunk at a time, and only chunks not already
+        in the store are compressed and written."""
+        chunks = []
+        size = 0
+        with open(path, "rb") as file:
+            for data in self._read_chunks(file):
+                chunks.append(self._add_chunk(data))
+                size += len(data)
+
+        # the manifest is written last, so it only ever refers to chunks
+        # that exist on disk
+        manifest = os.path.join(self.folder, name + BACKUP_EXT)
+        self._write_atomically(
+            manifest,
+            json.dumps(
+                dict(version=1, size=size, chunk_size=self.chunk_size, chunks=chunks)
+            ).encode("utf8"),
+        )
+        return manifest
+
+    def _read_chunks(self, file: BinaryIO) -> Iterator[bytes]:
+        while True:
+            data = file.read(self.chunk_size)
+            if not data:
+                return
+            yield data
+
+    def _add_chunk(self, data: bytes) -> str:
+        csum = sha1(data).hexdigest()
+        path = self._chunk_path(csum)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_atomically(path, zlib.compress(data))
+        return csum
+
+    def _chunk_path(self, csum: str) -> str:
+        return os.path.join(self.chunk_folder, csum[:2], csum)
+
+    def _write_atomically(self, path: str, data: bytes) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+
+    # Restoring
+    ##########################################################################
+
+    def restore(self, manifest: str, file: BinaryIO) -> None:
+        "Reassemble the backup described by manifest into file."
+        for csum in self._load_manifest(manifest)["chunks"]:
+            with open(self._chunk_path(csum), "rb") as chunk:
+                data = zlib.decompress(chunk.read())
+            if sha1(data).hexdigest() != csum:
+                raise Exception(f"backup chunk {csum} is corrupt")
+            file.write(data)
+
+    def _load_manifest(self, manifest: str) -> dict:
+        with open(manifest, "rb") as file:
+            return json.loads(file.read().decode("utf8"))
+
+    # Listing and removal
+    ##########################################################################
+
+    def backups(self) -> List[str]:
+        "Paths of all backups in the store, oldest first."
+        return [
+            os.path.join(self.folder, file)
+            for file in sorted(os.listdir(self.folder))
+            if BACKUP_RE.match(file)
+        ]
+
+    def prune(self, nbacks: int, nperiodic: int) -> None:
+        """Keep the newest nbacks backups, including those made by older
+        versions, and the newest nperiodic periodic backups, removing the
+        rest and any chunks no longer used."""
+        regular = []
+        periodic = []
+        for file in sorted(os.listdir(self.folder)):
+            path = os.path.join(self.folder, file)
+            if LEGACY_BACKUP_RE.match(file):
+                regular.append(path)
+            elif BACKUP_RE.match(file):
+                if file.endswith(PERIODIC_SUFFIX + BACKUP_EXT):
+                    periodic.append(path)
+                else:
+                    regular.append(path)
+
+        for paths, keep in ((regular, nbacks), (periodic, nperiodic)):
+            for path in paths[: max(0, len(paths) - keep)]:
+                if path.endswith(BACKUP_EXT):
+                    self.remove(path)
+                else:
+                    os.unlink(path)
+        self.remove_unused_chunks()
+
+    def remove(self, manifest: str) -> None:
+        "Remove a backup. Call remove_unused_chunks() afterwards to free space."
+        os.unlink(manifest)
+
+    def remove_unused_chunks(self) -> None:
+        used: Set[str] = set()
+        for manifest in self.backups():
+            used.update(self._load_manifest(manifest)["chunks"])
+
+        if not os.path.exists(self.chunk_folder):
+            return
+        for prefix in os.listdir(self.chunk_folder):
+            folder = os.path.join(self.chunk_folder, prefix)
+            for file in os.listdir(folder):
+                if file not in used:
+                    os.unlink(os.path.join(folder, file))
@@ -104,10 +104,12 @@ class Card:
             flags=self.flags,
             data=self.data,
         )
-        if self.id != 0:
-            self.col.backend.update_card(card)
-        else:
-            self.id = self.col.backend.add_card(card)
+        # the card's deck and flag are available to templates
+        with self.col.render_cache.updating_note(self.nid):
+            if self.id != 0:
+                self.col.backend.update_card(card)
+            else:
+                self.id = self.col.backend.add_card(card)
 
     def question(self, reload: bool = False, browser: bool = False) -> str:
         return self.render_output(reload, browser).question_and_style()
@@ -129,11 +131,7 @@ class Card:
         self, reload: bool = False, browser: bool = False
     ) -> anki.template.TemplateRenderOutput:
         if not self._render_output or reload:
-            self._render_output = (
-                anki.template.TemplateRenderContext.from_existing_card(
-                    self, browser
-                ).render()
-            )
+            self._render_output = self.col.render_cache.render(self, browser, reload)
         return self._render_output
 
     def set_render_output(self, output: anki.template.TemplateRenderOutput) -> None:
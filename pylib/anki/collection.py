@@ -52,6 +52,7 @@ class Collection:
         self._should_log = log
         self.server = server
         self.path = os.path.abspath(path)
+        self.render_cache = anki.template.TemplateRenderCache(self.backend)
         self.reopen()
 
         self.log(self.path, anki.version)
@@ -274,6 +275,7 @@ class Collection:
             self.media.connect()
         self.db = DBProxy(weakref.proxy(self.backend))
         self.db.begin()
+        self.render_cache.clear()
 
         self._openLog()
 
@@ -344,6 +346,18 @@ class Collection:
     def add_note(self, note: Note, deck_id: int) -> None:
         note.id = self.backend.add_note(note=note.to_backend_note(), deck_id=deck_id)
 
+    def add_notes(
+        self,
+        notes: Sequence[pb.Note],
+        deck_id: int,
+        generate_cards: bool = True,
+    ) -> None:
+        """Add or replace multiple notes in a single transaction, keeping any
+        provided note ids, modification times and usns. Used by the importers."""
+        self.backend.add_notes(
+            notes=notes, deck_id=deck_id, generate_cards=generate_cards
+        )
+
     def remove_notes(self, note_ids: Sequence[int]) -> None:
         hooks.notes_will_be_deleted(self, note_ids)
         self.backend.remove_notes(note_ids=note_ids, card_ids=[])
@@ -387,6 +401,12 @@ class Collection:
     def set_deck(self, card_ids: List[int], deck_id: int) -> None:
         self.backend.set_deck(card_ids=card_ids, deck_id=deck_id)
 
+    def render_cards(
+        self, card_ids: Sequence[int], browser: bool = False
+    ) -> List[anki.template.TemplateRenderOutput]:
+        "Render multiple cards at once. Much faster than calling card.q() on each."
+        return anki.template.render_existing_cards(self, card_ids, browser)
+
     # legacy
 
     def remCards(self, ids: List[int], notes: bool = True) -> None:
@@ -467,6 +487,7 @@ class Collection:
         field: Optional[str] = None,
         fold: bool = True,
     ) -> int:
+        self.render_cache.clear()
         return anki.find.findReplace(self, nids, src, dst, regex, field, fold)
 
     def findDupes(self, fieldName: str, search: str = "") -> List[Tuple[Any, list]]:
@@ -687,6 +708,14 @@ select id from notes where mid = ?) limit 1"""
         self.db.execute("analyze")
         self.db.begin()
 
+    def backup_to(self, path: str) -> None:
+        """Write a consistent copy of the collection to path, without closing it.
+
+        Only committed changes are included, so call .save() beforehand. The
+        file is read with a separate connection, so this may be called from
+        a background thread while the collection is in use."""
+        self.backend.backup_collection(path)
+
     # Logging
     ##########################################################################
 
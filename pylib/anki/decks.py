@@ -240,6 +240,8 @@ class DeckManager:
         "Rename deck prefix to NAME if not exists. Updates children."
         g["name"] = newName
         self.update(g, preserve_usn=False)
+        # cards may show the deck name
+        self.col.render_cache.clear()
         return
 
     # Drag/drop
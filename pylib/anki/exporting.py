@@ -24,6 +24,9 @@ class Exporter:
     includeTags: Optional[bool] = None
     includeSched: Optional[bool] = None
     includeMedia: Optional[bool] = None
+    # number of cards/notes fetched and written at once by exporters that
+    # stream their output
+    batchSize = 1000
 
     def __init__(
         self,
@@ -101,19 +104,18 @@ class TextCardExporter(Exporter):
 
     def doExport(self, file) -> None:
         ids = sorted(self.cardIds())
-        strids = ids2str(ids)
 
         def esc(s):
             # strip off the repeated question in answer if exists
             s = re.sub("(?si)^.*<hr id=answer>\n*", "", s)
             return self.processText(s)
 
-        out = ""
-        for cid in ids:
-            c = self.col.getCard(cid)
-            out += esc(c.q())
-            out += "\t" + esc(c.a()) + "\n"
-        file.write(out.encode("utf-8"))
+        for i in range(0, len(ids), self.batchSize):
+            out = []
+            for output in self.col.render_cards(ids[i : i + self.batchSize]):
+                out.append(esc(output.question_and_style()))
+                out.append("\t" + esc(output.answer_and_style()) + "\n")
+            file.write("".join(out).encode("utf-8"))
 
 
 # Notes as TSV
@@ -133,28 +135,33 @@ class TextNoteExporter(Exporter):
 
     def doExport(self, file: BufferedWriter) -> None:
         cardIds = self.cardIds()
-        data = []
-        for id, flds, tags in self.col.db.execute(
-            """
-select guid, flds, tags from notes
-where id in
-(select nid from cards
-where cards.id in %s)"""
+        nids = self.col.db.list(
+            "select distinct nid from cards where id in %s order by nid"
             % ids2str(cardIds)
-        ):
-            row = []
-            # note id
-            if self.includeID:
-                row.append(str(id))
-            # fields
-            row.extend([self.processText(f) for f in splitFields(flds)])
-            # tags
-            if self.includeTags:
-                row.append(tags.strip())
-            data.append("\t".join(row))
-        self.count = len(data)
-        out = "\n".join(data)
-        file.write(out.encode("utf-8"))
+        )
+        self.count = 0
+        for i in range(0, len(nids), self.batchSize):
+            data = []
+            for id, flds, tags in self.col.db.execute(
+                "select guid, flds, tags from notes where id in %s order by id"
+                % ids2str(nids[i : i + self.batchSize])
+            ):
+                row = []
+                # note id
+                if self.includeID:
+                    row.append(str(id))
+                # fields
+                row.extend([self.processText(f) for f in splitFields(flds)])
+                # tags
+                if self.includeTags:
+                    row.append(tags.strip())
+                data.append("\t".join(row))
+            # rows are separated, not terminated, by newlines
+            out = "\n".join(data)
+            if self.count and data:
+                out = "\n" + out
+            self.count += len(data)
+            file.write(out.encode("utf-8"))
 
 
 # Anki decks
@@ -260,14 +267,13 @@ class AnkiExporter(Exporter):
         media = {}
         self.mediaDir = self.src.media.dir()
         if self.includeMedia:
-            for row in notedata:
-                flds = row[6]
-                mid = row[2]
-                for file in self.src.media.filesInStr(mid, flds):
-                    # skip files in subdirs
-                    if file != os.path.basename(file):
-                        continue
-                    media[file] = True
+            for file in self.src.media.files_in_notes(
+                (row[2], row[6]) for row in notedata
+            ):
+                # skip files in subdirs
+                if file != os.path.basename(file):
+                    continue
+                media[file] = True
             if self.mediaDir:
                 for fname in os.listdir(self.mediaDir):
                     path = os.path.join(self.mediaDir, fname)
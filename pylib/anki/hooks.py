@@ -58,7 +58,10 @@ card_did_leech = _CardDidLeechHook()
 
 
 class _CardDidRenderHook:
-    """Can modify the resulting text after rendering completes."""
+    """Can modify the resulting text after rendering completes.
+
+    Rendered output is cached, so this is not called again when an
+    unchanged card is shown a second time."""
 
     _hooks: List[
         Callable[
@@ -598,6 +601,11 @@ def runFilter(hook: str, arg: Any, *args) -> Any:
     return arg
 
 
+def hasHook(hook: str) -> bool:
+    "True if any functions are on hook."
+    return bool(_hooks.get(hook))
+
+
 def addHook(hook: str, func: Callable) -> None:
     "Add a function to hook. Ignore if already on hook."
     if not _hooks.get(hook, None):
@@ -88,7 +88,6 @@ class Anki2Importer(Importer):
         # iterate over source collection
         add = []
         update = []
-        dirty = []
         usn = self.dst.usn()
         dupesIdentical = []
         dupesIgnored = []
@@ -108,7 +107,6 @@ class Anki2Importer(Importer):
                 # update media references in case of dupes
                 note[6] = self._mungeMedia(note[MID], note[6])
                 add.append(note)
-                dirty.append(note[0])
                 # note we have the added the guid
                 self._notes[note[GUID]] = (note[0], note[3], note[MID])
             else:
@@ -124,7 +122,6 @@ class Anki2Importer(Importer):
                             note[4] = usn
                             note[6] = self._mungeMedia(note[MID], note[6])
                             update.append(note)
-                            dirty.append(note[0])
                         else:
                             dupesIgnored.append(note)
                             self._ignoredGuids[note[GUID]] = True
@@ -169,14 +166,12 @@ class Anki2Importer(Importer):
         self.dupes = len(dupesIdentical)
         self.added = len(add)
         self.updated = len(update)
-        # add to col
-        self.dst.db.executemany(
-            "insert or replace into notes values (?,?,?,?,?,?,?,?,?,?,?)", add
-        )
-        self.dst.db.executemany(
-            "insert or replace into notes values (?,?,?,?,?,?,?,?,?,?,?)", update
+        # add to col; cards are imported separately
+        self.dst.add_notes(
+            [self._backendNoteFromRow(row) for row in add + update],
+            deck_id=0,
+            generate_cards=False,
         )
-        self.dst.updateFieldCache(dirty)
 
     # determine if note is a duplicate, and adjust mid and/or guid as required
     # returns true if note should be added
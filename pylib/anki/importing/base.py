@@ -1,10 +1,11 @@
 # Copyright: Ankitects Pty Ltd and contributors
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Sequence
 
 from anki.collection import Collection
-from anki.utils import maxID
+from anki.rsbackend import BackendNote
+from anki.utils import maxID, splitFields
 
 # Base importer
 ##########################################################################
@@ -26,6 +27,18 @@ class Importer:
     def run(self) -> None:
         pass
 
+    def _backendNoteFromRow(self, row: Sequence[Any]) -> BackendNote:
+        "Convert a row in the format of the notes table for col.add_notes()."
+        return BackendNote(
+            id=row[0],
+            guid=row[1],
+            notetype_id=row[2],
+            mtime_secs=row[3],
+            usn=row[4],
+            tags=self.col.tags.split(row[5]),
+            fields=splitFields(row[6]),
+        )
+
     # Timestamps
     ######################################################################
     # It's too inefficient to check for existing ids on every object,
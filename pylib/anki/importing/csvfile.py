@@ -2,8 +2,9 @@
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
 import csv
+import itertools
 import re
-from typing import Any, List, Optional, TextIO, Union
+from typing import Any, Iterator, List, Optional, TextIO, Union
 
 from anki.collection import Collection
 from anki.importing.noteimp import ForeignNote, NoteImporter
@@ -14,6 +15,9 @@ class TextImporter(NoteImporter):
 
     needDelimiter = True
     patterns = "\t|,;:"
+    batchSize = 1000
+    # number of lines read up front to detect the file format
+    sniffLines = 10
 
     def __init__(self, col: Collection, file: str) -> None:
         NoteImporter.__init__(self, col, file)
@@ -24,23 +28,26 @@ class TextImporter(NoteImporter):
         self.numFields = 0
         self.dialect: Optional[Any]
         self.data: Optional[Union[str, List[str]]]
+        self._remainingLines: Iterator[str] = iter([])
 
     def foreignNotes(self) -> List[ForeignNote]:
+        return list(self.iterForeignNotes())
+
+    def iterForeignNotes(self) -> Iterator[ForeignNote]:
         self.open()
-        # process all lines
-        log = []
-        notes = []
-        lineNum = 0
-        ignored = 0
+        # process all lines, reading the file as we go
+        self.log = []
+        self.ignored = 0
+        lines = itertools.chain(self.data, self._remainingLines)
         if self.delimiter:
-            reader = csv.reader(self.data, delimiter=self.delimiter, doublequote=True)
+            reader = csv.reader(lines, delimiter=self.delimiter, doublequote=True)
         else:
-            reader = csv.reader(self.data, self.dialect, doublequote=True)
+            reader = csv.reader(lines, self.dialect, doublequote=True)
         try:
             for row in reader:
                 if len(row) != self.numFields:
                     if row:
-                        log.append(
+                        self.log.append(
                             _("'%(row)s' had %(num1)d fields, " "expected %(num2)d")
                             % {
                                 "row": " ".join(row),
@@ -48,16 +55,13 @@ class TextImporter(NoteImporter):
                                 "num2": self.numFields,
                             }
                         )
-                        ignored += 1
+                        self.ignored += 1
                     continue
-                note = self.noteFromFields(row)
-                notes.append(note)
+                yield self.noteFromFields(row)
         except (csv.Error) as e:
-            log.append(_("Aborted: %s") % str(e))
-        self.log = log
-        self.ignored = ignored
-        self.close()
-        return notes
+            self.log.append(_("Aborted: %s") % str(e))
+        finally:
+            self.close()
 
     def open(self) -> None:
         "Parse the top line and determine the pattern and number of fields."
@@ -72,35 +76,62 @@ class TextImporter(NoteImporter):
     def openFile(self) -> None:
         self.dialect = None
         self.fileobj = open(self.file, "r", encoding="utf-8-sig")
-        self.data = self.fileobj.read()
-
-        def sub(s):
-            return re.sub(r"^\#.*$", "__comment", s)
-
-        self.data = [
-            sub(x) + "\n" for x in self.data.split("\n") if sub(x) != "__comment"
-        ]
+        # only the first few lines are kept in self.data to detect the
+        # format; the rest are read on demand by iterForeignNotes()
+        self._remainingLines = self._readLines(self.fileobj)
+        self.data = list(itertools.islice(self._remainingLines, self.sniffLines))
         if self.data:
             if self.data[0].startswith("tags:"):
                 tags = str(self.data[0][5:]).strip()
                 self.tagsToAdd = tags.split(" ")
                 del self.data[0]
+                self.data.extend(itertools.islice(self._remainingLines, 1))
+            self._readAheadToRecord()
             self.updateDelimiter()
         if not self.dialect and not self.delimiter:
             raise Exception("unknownFormat")
 
+    def _readAheadToRecord(self) -> None:
+        """Extend self.data until it holds a non-blank line and ends outside a
+        quoted field, so the first record is complete even if it is preceded
+        by blank lines or spans more than sniffLines lines."""
+        hasContent = any(line.strip() for line in self.data)
+        quotes = sum(line.count('"') for line in self.data)
+        while not hasContent or quotes % 2:
+            line = next(self._remainingLines, None)
+            if line is None:
+                break
+            self.data.append(line)
+            hasContent = hasContent or bool(line.strip())
+            quotes += line.count('"')
+
+    def _firstLine(self) -> str:
+        "The first buffered line that is not blank."
+        return next((line for line in self.data if line.strip()), self.data[0])
+
+    def _readLines(self, fileobj: TextIO) -> Iterator[str]:
+        "Yield lines of the file, skipping comments."
+        for line in fileobj:
+            line = re.sub(r"^\#.*$", "__comment", line.rstrip("\n"))
+            if line != "__comment":
+                yield line + "\n"
+
     def updateDelimiter(self) -> None:
         def err():
             raise Exception("unknownFormat")
 
         self.dialect = None
         sniffer = csv.Sniffer()
+        firstLine = self._firstLine()
         if not self.delimiter:
+            # sniff from the first line with content; the buffer ends after
+            # a complete record, so may be longer than sniffLines
+            sample = self.data[self.data.index(firstLine) :]
             try:
-                self.dialect = sniffer.sniff("\n".join(self.data[:10]), self.patterns)
+                self.dialect = sniffer.sniff("\n".join(sample), self.patterns)
             except:
                 try:
-                    self.dialect = sniffer.sniff(self.data[0], self.patterns)
+                    self.dialect = sniffer.sniff(firstLine, self.patterns)
                 except:
                     pass
         if self.dialect:
@@ -110,11 +141,11 @@ class TextImporter(NoteImporter):
                 err()
         else:
             if not self.delimiter:
-                if "\t" in self.data[0]:
+                if "\t" in firstLine:
                     self.delimiter = "\t"
-                elif ";" in self.data[0]:
+                elif ";" in firstLine:
                     self.delimiter = ";"
-                elif "," in self.data[0]:
+                elif "," in firstLine:
                     self.delimiter = ","
                 else:
                     self.delimiter = " "
@@ -2,7 +2,18 @@
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
 import html
-from typing import Dict, List, Optional, Tuple, Union
+import itertools
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from anki.collection import Collection
 from anki.consts import NEW_CARDS_RANDOM, STARTING_FACTOR
@@ -11,6 +22,7 @@ from anki.lang import _, ngettext
 from anki.utils import (
     fieldChecksum,
     guid64,
+    ids2str,
     intTime,
     joinFields,
     splitFields,
@@ -41,6 +53,25 @@ class ForeignCard:
         self.lapses = 0
 
 
+# Field processing
+######################################################################
+
+
+def normalizeFields(
+    fields: List[str], allowHTML: bool, fld0idx: int
+) -> Tuple[List[str], int]:
+    "Return cleaned up fields and the checksum of the first field."
+    out = []
+    for fld in fields:
+        if not allowHTML:
+            fld = html.escape(fld, quote=False)
+        fld = fld.strip()
+        if not allowHTML:
+            fld = fld.replace("\n", "<br>")
+        out.append(fld)
+    return out, fieldChecksum(out[fld0idx])
+
+
 # Base class for CSV and similar text-based imports
 ######################################################################
 
@@ -67,6 +98,11 @@ class NoteImporter(Importer):
     importMode = UPDATE_MODE
     mapping: Optional[List[str]]
     tagModified: Optional[str]
+    # if set, notes are read, checked and written to the collection this
+    # many at a time, instead of gathering all of them in memory first
+    batchSize: Optional[int] = None
+    # called with the number of notes processed after each batch
+    progressCallback: Optional[Callable[[int], None]] = None
 
     def __init__(self, col: Collection, file: str) -> None:
         Importer.__init__(self, col, file)
@@ -78,7 +114,10 @@ class NoteImporter(Importer):
     def run(self) -> None:
         "Import."
         assert self.mapping
-        c = self.foreignNotes()
+        if self.batchSize:
+            c = self.iterForeignNotes()
+        else:
+            c = self.foreignNotes()
         self.importNotes(c)
 
     def fields(self) -> int:
@@ -103,6 +142,10 @@ class NoteImporter(Importer):
         "Return a list of foreign notes for importing."
         return []
 
+    def iterForeignNotes(self) -> Iterable[ForeignNote]:
+        "Yield foreign notes one at a time. Used when importing in batches."
+        return iter(self.foreignNotes())
+
     def open(self) -> None:
         "Open file and ensure it's in the right format."
         return
@@ -111,7 +154,7 @@ class NoteImporter(Importer):
         "Closes the open file."
         return
 
-    def importNotes(self, notes: List[ForeignNote]) -> None:
+    def importNotes(self, notes: Iterable[ForeignNote]) -> None:
         "Convert each card into a note, apply attributes and add to col."
         assert self.mappingOk()
         # note whether tags are mapped
@@ -120,7 +163,7 @@ class NoteImporter(Importer):
             if f == "_tags":
                 self._tagsMapped = True
         # gather checks for duplicate comparison
-        csums: Dict[str, List[int]] = {}
+        csums: Dict[int, List[int]] = {}
         for csum, id in self.col.db.execute(
             "select csum, id from notes where mid = ?", self.model["id"]
         ):
@@ -128,79 +171,81 @@ class NoteImporter(Importer):
                 csums[csum].append(id)
             else:
                 csums[csum] = [id]
-        firsts: Dict[str, bool] = {}
+        firsts: Set[str] = set()
         fld0idx = self.mapping.index(self.model["flds"][0]["name"])
         self._fmap = self.col.models.fieldMap(self.model)
         self._nextID = timestampID(self.col.db, "notes")
+        # existing notes that may be duplicates, keyed on their first field;
+        # filled in from csums as the import progresses
+        self._firstIndex: Dict[str, List[int]] = {}
         # loop through the notes
         updates = []
         updateLog = []
         updateLogTxt = _("First field matched: %s")
         dupeLogTxt = _("Added duplicate with first field: %s")
         new = []
+        added = 0
         self._ids: List[int] = []
         self._cards: List[Tuple] = []
+        self.updateCount = 0
+        self.total = 0
         dupeCount = 0
-        dupes: List[str] = []
-        for n in notes:
-            for c in range(len(n.fields)):
-                if not self.allowHTML:
-                    n.fields[c] = html.escape(n.fields[c], quote=False)
-                n.fields[c] = n.fields[c].strip()
-                if not self.allowHTML:
-                    n.fields[c] = n.fields[c].replace("\n", "<br>")
-            fld0 = n.fields[fld0idx]
-            csum = fieldChecksum(fld0)
-            # first field must exist
-            if not fld0:
-                self.log.append(_("Empty first field: %s") % " ".join(n.fields))
-                continue
-            # earlier in import?
-            if fld0 in firsts and self.importMode != ADD_MODE:
-                # duplicates in source file; log and ignore
-                self.log.append(_("Appeared twice in file: %s") % fld0)
-                continue
-            firsts[fld0] = True
-            # already exists?
-            found = False
-            if csum in csums:
-                # csum is not a guarantee; have to check
-                for id in csums[csum]:
-                    flds = self.col.db.scalar("select flds from notes where id = ?", id)
-                    sflds = splitFields(flds)
-                    if fld0 == sflds[0]:
-                        # duplicate
-                        found = True
-                        if self.importMode == UPDATE_MODE:
-                            data = self.updateData(n, id, sflds)
-                            if data:
-                                updates.append(data)
-                                updateLog.append(updateLogTxt % fld0)
-                                dupeCount += 1
-                                found = True
-                        elif self.importMode == IGNORE_MODE:
+        dupes: Set[str] = set()
+        for batch in self._batches(notes):
+            fld0csums = self._processBatchFields(batch, fld0idx)
+            existing = self._loadPossibleDupes(batch, fld0idx, fld0csums, csums)
+            for n in batch:
+                fld0 = n.fields[fld0idx]
+                # first field must exist
+                if not fld0:
+                    self.log.append(_("Empty first field: %s") % " ".join(n.fields))
+                    continue
+                # earlier in import?
+                if fld0 in firsts and self.importMode != ADD_MODE:
+                    # duplicates in source file; log and ignore
+                    self.log.append(_("Appeared twice in file: %s") % fld0)
+                    continue
+                firsts.add(fld0)
+                # already exists?
+                found = False
+                for id in self._firstIndex.get(fld0, []):
+                    # duplicate
+                    found = True
+                    if self.importMode == UPDATE_MODE:
+                        sflds = existing.get(id)
+                        if sflds is None:
+                            sflds = splitFields(
+                                self.col.db.scalar(
+                                    "select flds from notes where id = ?", id
+                                )
+                            )
+                        data = self.updateData(n, id, sflds)
+                        if data:
+                            updates.append(data)
+                            updateLog.append(updateLogTxt % fld0)
                             dupeCount += 1
-                        elif self.importMode == ADD_MODE:
-                            # allow duplicates in this case
-                            if fld0 not in dupes:
-                                # only show message once, no matter how many
-                                # duplicates are in the collection already
-                                updateLog.append(dupeLogTxt % fld0)
-                                dupes.append(fld0)
-                            found = False
-            # newly add
-            if not found:
-                data = self.newData(n)
-                if data:
-                    new.append(data)
-                    # note that we've seen this note once already
-                    firsts[fld0] = True
-        self.addNew(new)
-        self.addUpdates(updates)
-        # generate cards + update field cache
-        self.col.after_note_updates(self._ids, mark_modified=False)
-        # apply scheduling updates
-        self.updateCards()
+                            found = True
+                    elif self.importMode == IGNORE_MODE:
+                        dupeCount += 1
+                    elif self.importMode == ADD_MODE:
+                        # allow duplicates in this case
+                        if fld0 not in dupes:
+                            # only show message once, no matter how many
+                            # duplicates are in the collection already
+                            updateLog.append(dupeLogTxt % fld0)
+                            dupes.add(fld0)
+                        found = False
+                # newly add
+                if not found:
+                    data = self.newData(n)
+                    if data:
+                        new.append(data)
+                        # note that we've seen this note once already
+                        firsts.add(fld0)
+            added += len(new)
+            self._flushBatch(new, updates)
+            new = []
+            updates = []
         # we randomize or order here, to ensure that siblings
         # have the same due#
         did = self.col.decks.selected()
@@ -209,7 +254,7 @@ class NoteImporter(Importer):
         if conf["new"]["order"] == NEW_CARDS_RANDOM:
             self.col.sched.randomizeCards(did)
 
-        part1 = ngettext("%d note added", "%d notes added", len(new)) % len(new)
+        part1 = ngettext("%d note added", "%d notes added", added) % added
         part2 = (
             ngettext("%d note updated", "%d notes updated", self.updateCount)
             % self.updateCount
@@ -225,7 +270,73 @@ class NoteImporter(Importer):
         )
         self.log.append("%s, %s, %s." % (part1, part2, part3))
         self.log.extend(updateLog)
-        self.total = len(self._ids)
+
+    def _batches(self, notes: Iterable[ForeignNote]) -> Iterator[List[ForeignNote]]:
+        "Split notes into lists of batchSize, or a single list if unset."
+        if not self.batchSize:
+            yield list(notes)
+            return
+        it = iter(notes)
+        while True:
+            batch = list(itertools.islice(it, self.batchSize))
+            if not batch:
+                return
+            yield batch
+
+    def _processBatchFields(self, notes: List[ForeignNote], fld0idx: int) -> List[int]:
+        """Clean up the fields of the provided notes in place. Returns the
+        checksum of each note's first field."""
+        fld0csums = []
+        for n in notes:
+            n.fields, csum = normalizeFields(n.fields, self.allowHTML, fld0idx)
+            fld0csums.append(csum)
+        return fld0csums
+
+    def _loadPossibleDupes(
+        self,
+        notes: List[ForeignNote],
+        fld0idx: int,
+        fld0csums: List[int],
+        csums: Dict[int, List[int]],
+    ) -> Dict[int, List[str]]:
+        """Fetch existing notes whose checksum matches the first field of the
+        provided notes in a single query, and add them to the first field index.
+        Returns the split fields of the fetched notes, keyed on note id."""
+        ids: List[int] = []
+        for n, csum in zip(notes, fld0csums):
+            if n.fields[fld0idx]:
+                ids.extend(csums.pop(csum, []))
+        fields: Dict[int, List[str]] = {}
+        if not ids:
+            return fields
+        for id, flds in self.col.db.execute(
+            "select id, flds from notes where id in %s" % ids2str(ids)
+        ):
+            sflds = splitFields(flds)
+            self._firstIndex.setdefault(sflds[0], []).append(id)
+            fields[id] = sflds
+        return fields
+
+    def _flushBatch(
+        self, new: List[List[Union[int, str]]], updates: List[List[Union[int, str]]]
+    ) -> None:
+        "Write pending notes to the collection and reset the batch state."
+        self.addNew(new)
+        self.addUpdates(updates)
+        # generate cards + update field cache of updated notes; new notes
+        # were taken care of when they were added
+        newIds = set(row[0] for row in new)
+        updatedIds = [id for id in self._ids if id not in newIds]
+        self.col.after_note_updates(updatedIds, mark_modified=False)
+        # apply scheduling updates
+        self.updateCards()
+        if not self._ids:
+            return
+        self.total += len(self._ids)
+        self._ids = []
+        self._cards = []
+        if self.progressCallback:
+            self.progressCallback(self.total)
 
     def newData(self, n: ForeignNote) -> Optional[list]:
         id = self._nextID
@@ -250,8 +361,10 @@ class NoteImporter(Importer):
         ]
 
     def addNew(self, rows: List[List[Union[int, str]]]) -> None:
-        self.col.db.executemany(
-            "insert or replace into notes values (?,?,?,?,?,?,?,?,?,?,?)", rows
+        "Add new notes and generate their cards."
+        self.col.add_notes(
+            [self._backendNoteFromRow(row) for row in rows],
+            deck_id=self.model.get("did") or 0,
         )
 
     def updateData(self, n: ForeignNote, id: int, sflds: List[str]) -> Optional[list]:
@@ -292,7 +405,7 @@ where id = ? and flds != ?""",
                 rows,
             )
         changes2 = self.col.db.scalar("select total_changes()")
-        self.updateCount = changes2 - changes
+        self.updateCount += changes2 - changes
 
     def processFields(
         self, note: ForeignNote, fields: Optional[List[str]] = None
@@ -7,8 +7,9 @@ import re
 import sys
 import time
 import unicodedata
+import xml.etree.ElementTree as ET
 from string import capwords
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 from xml.dom import minidom
 from xml.dom.minidom import Element, Text
 
@@ -68,6 +69,7 @@ class SupermemoXmlImporter(NoteImporter):
 
     needMapper = False
     allowHTML = True
+    batchSize = 1000
 
     """
     Supermemo XML export's to Anki parser.
@@ -186,22 +188,23 @@ class SupermemoXmlImporter(NoteImporter):
     ## DEFAULT IMPORTER METHODS
 
     def foreignNotes(self) -> List[ForeignNote]:
+        self.notes = list(self.iterForeignNotes())
+        return self.notes
 
-        # Load file and parse it by minidom
-        self.loadSource(self.file)
-
-        # Migrating content / time consuming part
-        # addItemToCards is called for each sm element
+    def iterForeignNotes(self) -> Iterator[ForeignNote]:
+        # Parse the file incrementally; each note is yielded as soon as its
+        # element has been read, so the whole document is never in memory
         self.logger("Parsing started.")
-        self.parse()
+        # self.total is counted by importNotes() as batches are flushed
+        count = 0
+        for item in self.iterItems(self.file):
+            count += 1
+            yield self.noteFromItem(item)
         self.logger("Parsing done.")
 
-        # Return imported cards
-        self.total = len(self.notes)
         self.log.append(
-            ngettext("%d card imported.", "%d cards imported.", self.total) % self.total
+            ngettext("%d card imported.", "%d cards imported.", count) % count
         )
-        return self.notes
 
     def fields(self) -> int:
         return 2
@@ -209,6 +212,9 @@ class SupermemoXmlImporter(NoteImporter):
     ## PARSER METHODS
 
     def addItemToCards(self, item: SuperMemoElement) -> None:
+        self.notes.append(self.noteFromItem(item))
+
+    def noteFromItem(self, item: SuperMemoElement) -> ForeignNote:
         "This method actually do conversion"
 
         # new anki card
@@ -280,7 +286,7 @@ class SupermemoXmlImporter(NoteImporter):
 
             self.logger("Element tags\t- " + repr(note.tags), level=3)
 
-        self.notes.append(note)
+        return note
 
     def logger(self, text: str, level: int = 1) -> None:
         "Wrapper for Anki logger"
@@ -336,6 +342,42 @@ class SupermemoXmlImporter(NoteImporter):
         sock.close()
         self.logger("Load done.")
 
+    # STREAMING PARSE
+    def iterItems(self, source: str) -> Iterator[SuperMemoElement]:
+        """Parse source incrementally, yielding items to import as their
+        SuperMemoElement closes. Handled nodes are removed from the tree
+        straight away, so memory use doesn't grow with the size of the file.
+        Mirrors the do_* handlers used by parse()."""
+        self.logger("Load started...")
+        nodes: List[ET.Element] = []
+        for event, node in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                nodes.append(node)
+                if node.tag == "SuperMemoElement":
+                    self._pushElement()
+                continue
+
+            nodes.pop()
+            parent = nodes[-1].tag if nodes else None
+            grandparent = nodes[-2].tag if len(nodes) > 1 else None
+            if node.tag == "SuperMemoElement":
+                smel = self._popElement()
+                if smel is not None:
+                    yield smel
+            elif parent == "SuperMemoElement" and node.tag == "Title":
+                self._startTopic(node.tag, node.text or "")
+            elif parent == "SuperMemoElement" and node.tag == "Type":
+                self.cntElm[-1][node.tag] = node.text
+            elif grandparent == "SuperMemoElement" and parent in (
+                "Content",
+                "LearningData",
+            ):
+                if node.text is not None:
+                    self.cntElm[-1][node.tag] = node.text
+            if nodes:
+                nodes[-1].remove(node)
+        self.logger("Load done.")
+
     # PARSE
     def parse(self, node: Optional[Union[Text, Element]] = None) -> None:
         "Parse method - parses document elements"
@@ -388,14 +430,26 @@ class SupermemoXmlImporter(NoteImporter):
     def do_SuperMemoElement(self, node: Element) -> None:
         "Process SM Element (Type - Title,Topics)"
 
+        self._pushElement()
+
+        # parse all child elements
+        for child in node.childNodes:
+            self.parse(child)
+
+        smel = self._popElement()
+        if smel is not None:
+            self.addItemToCards(smel)
+
+    def _pushElement(self) -> None:
+        "Start a new SM Element"
+
         self.logger("=" * 45, level=3)
 
         self.cntElm.append(SuperMemoElement())
         self.cntElm[-1]["lTitle"] = self.cntMeta["title"]
 
-        # parse all child elements
-        for child in node.childNodes:
-            self.parse(child)
+    def _popElement(self) -> Optional[SuperMemoElement]:
+        "Finish the current SM Element, returning it if it should be imported"
 
         # strip all saved strings, just for sure
         for key in list(self.cntElm[-1].keys()):
@@ -415,7 +469,6 @@ class SupermemoXmlImporter(NoteImporter):
                     self.logger("Element skiped  \t- not memorized ...", level=3)
                 else:
                     # import sm element data to Anki
-                    self.addItemToCards(smel)
                     self.logger("Import element \t- " + smel["Question"], level=3)
 
                     # print element
@@ -424,6 +477,7 @@ class SupermemoXmlImporter(NoteImporter):
                         self.logger(
                             "\t%s %s" % ((key + ":").ljust(15), smel[key]), level=3
                         )
+                    return smel
             else:
                 self.logger("Element skiped  \t- no valid Q and A ...", level=3)
 
@@ -437,6 +491,8 @@ class SupermemoXmlImporter(NoteImporter):
                 t = self.cntMeta["title"].pop()
                 self.logger("End of topic \t- %s" % (t), level=2)
 
+        return None
+
     def do_Content(self, node: Element) -> None:
         "Process SM element Content"
 
@@ -464,8 +520,11 @@ class SupermemoXmlImporter(NoteImporter):
     def do_Title(self, node: Element) -> None:
         "Process SM element Title"
 
-        t = self._decode_htmlescapes(node.firstChild.data)
-        self.cntElm[-1][node.tagName] = t
+        self._startTopic(node.tagName, node.firstChild.data)
+
+    def _startTopic(self, tagName: str, text: str) -> None:
+        t = self._decode_htmlescapes(text)
+        self.cntElm[-1][tagName] = t
         self.cntMeta["title"].append(t)
         self.cntElm[-1]["lTitle"] = self.cntMeta["title"]
         self.logger("Start of topic \t- " + " / ".join(self.cntMeta["title"]), level=2)
@@ -6,8 +6,11 @@ from __future__ import annotations
 import html
 import os
 import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import anki
 from anki import hooks
@@ -15,7 +18,7 @@ from anki.lang import _
 from anki.models import NoteType
 from anki.rsbackend import pb
 from anki.template import TemplateRenderContext, TemplateRenderOutput
-from anki.utils import call, isMac, namedtmp, tmpdir
+from anki.utils import call, isMac, tmpdir
 
 pngCommands = [
     ["latex", "-interaction=nonstopmode", "tmp.tex"],
@@ -56,6 +59,47 @@ class ExtractedLatexOutput:
         )
 
 
+class LatexCache:
+    """Remembers LaTeX work for one collection, so that cards can be rendered
+    repeatedly without asking the backend to extract the same LaTeX or
+    checking the media folder each time.
+
+    Images are assumed to stay in the media folder once they have been seen
+    there; the media manager clears this when it removes files."""
+
+    # number of extraction results to keep
+    max_extracted = 200
+
+    def __init__(self) -> None:
+        # filenames known to be in the media folder
+        self.existing: Set[str] = set()
+        # (filename, header, footer) -> error from the last render attempt
+        self.failed: Dict[Tuple[str, str, str], str] = {}
+        self._extracted: Dict[Tuple[str, bool, bool], ExtractedLatexOutput] = {}
+
+    def extract(
+        self,
+        html: str,
+        model: NoteType,
+        col: anki.collection.Collection,
+        expand_clozes: bool,
+    ) -> ExtractedLatexOutput:
+        key = (html, model.get("latexsvg", False), expand_clozes)
+        out = self._extracted.pop(key, None)
+        if out is None:
+            out = extract_latex(html, model, col, expand_clozes)
+            if len(self._extracted) >= self.max_extracted:
+                # drop the least recently used entry
+                del self._extracted[next(iter(self._extracted))]
+        self._extracted[key] = out
+        return out
+
+    def clear(self) -> None:
+        self.existing.clear()
+        self.failed.clear()
+        self._extracted.clear()
+
+
 def on_card_did_render(
     output: TemplateRenderOutput, ctx: TemplateRenderContext
 ) -> None:
@@ -82,27 +126,94 @@ def render_latex_returning_errors(
     """Returns (text, errors).
 
     errors will be non-empty if LaTeX failed to render."""
+    # all latex tags start with [
+    if "[" not in html:
+        return html, []
+
     svg = model.get("latexsvg", False)
     header = model["latexPre"]
     footer = model["latexPost"]
 
-    proto = col.backend.extract_latex(text=html, svg=svg, expand_clozes=expand_clozes)
-    out = ExtractedLatexOutput.from_proto(proto)
+    cache = col.media.latex_cache
+    out = cache.extract(html, model, col, expand_clozes)
     errors = []
     html = out.html
 
     for latex in out.latex:
         # don't need to render?
-        if not build or col.media.have(latex.filename):
+        if not build or latex.filename in cache.existing:
+            continue
+        if col.media.have(latex.filename):
+            cache.existing.add(latex.filename)
             continue
 
-        err = _save_latex_image(col, latex, header, footer, svg)
+        # don't retry LaTeX that has already failed
+        key = (latex.filename, header, footer)
+        err = cache.failed.get(key)
+        if err is None:
+            err = _save_latex_image(col, latex, header, footer, svg)
+            if err is None:
+                cache.existing.add(latex.filename)
+            else:
+                cache.failed[key] = err
         if err is not None:
             errors.append(err)
 
     return html, errors
 
 
+def extract_latex(
+    html: str,
+    model: NoteType,
+    col: anki.collection.Collection,
+    expand_clozes: bool = False,
+) -> ExtractedLatexOutput:
+    "Replace LaTeX in html with image links, without rendering the images."
+    proto = col.backend.extract_latex(
+        text=html, svg=model.get("latexsvg", False), expand_clozes=expand_clozes
+    )
+    return ExtractedLatexOutput.from_proto(proto)
+
+
+def render_latex_images(
+    col: anki.collection.Collection,
+    images: Dict[str, Tuple[str, bool]],
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """Render {filename: (latex, svg)} into the media folder, running up to
+    `workers` LaTeX processes at once. Defaults to one per CPU.
+
+    Yields (filename, error) as each image finishes; error is None if the
+    image was rendered. Closing the iterator early cancels the images that
+    have not been started."""
+    # without an explicit env, call() removes LD_LIBRARY_PATH from the
+    # process environment while it starts a process, which is not safe to
+    # do from multiple threads
+    env = dict(os.environ)
+    env.pop("LD_LIBRARY_PATH", None)
+
+    executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    futures = {
+        executor.submit(_render_latex_image, latex, svg, env): fname
+        for fname, (latex, svg) in images.items()
+    }
+    try:
+        for future in as_completed(futures):
+            fname = futures[future]
+            data, err = future.result()
+            if data is not None:
+                col.media.write_data(fname, data)
+            yield fname, err
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
+
+
+def latex_source(body: str, header: str, footer: str) -> str:
+    return header + "\n" + body + "\n" + footer
+
+
 def _save_latex_image(
     col: anki.collection.Collection,
     extracted: ExtractedLatex,
@@ -110,8 +221,22 @@ def _save_latex_image(
     footer: str,
     svg: bool,
 ) -> Optional[str]:
-    # add header/footer
-    latex = header + "\n" + extracted.latex_body + "\n" + footer
+    data, err = _render_latex_image(
+        latex_source(extracted.latex_body, header, footer), svg
+    )
+    if data is None:
+        return err
+    col.media.write_data(extracted.filename, data)
+    return None
+
+
+def _render_latex_image(
+    latex: str, svg: bool, env: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[bytes], Optional[str]]:
+    """Returns (image data, None), or (None, error).
+
+    Each image is rendered in its own temporary folder, so multiple images
+    can be rendered at once."""
     # it's only really secure if run in a jail, but these are the most common
     tmplatex = latex.replace("\\includegraphics", "")
     for bad in (
@@ -130,13 +255,14 @@ def _save_latex_image(
         bad_re = "\\" + bad + "[^a-zA-Z]"
         if re.search(bad_re, tmplatex):
             return (
+                None,
                 _(
                     """\
 For security reasons, '%s' is not allowed on cards. You can still use \
 it by placing the command in a different package, and importing that \
 package in the LaTeX header instead."""
                 )
-                % bad
+                % bad,
             )
 
     # commands to use
@@ -148,35 +274,28 @@ package in the LaTeX header instead."""
         ext = "png"
 
     # write into a temp file
-    log = open(namedtmp("latex_log.txt"), "w")
-    texpath = namedtmp("tmp.tex")
-    texfile = open(texpath, "w", encoding="utf8")
-    texfile.write(latex)
-    texfile.close()
-    oldcwd = os.getcwd()
-    png_or_svg = namedtmp("tmp.%s" % ext)
-    try:
-        # generate png/svg
-        os.chdir(tmpdir())
+    dir = tempfile.mkdtemp(dir=tmpdir())
+    logpath = os.path.join(dir, "latex_log.txt")
+    texpath = os.path.join(dir, "tmp.tex")
+    with open(texpath, "w", encoding="utf8") as texfile:
+        texfile.write(latex)
+    # generate png/svg
+    with open(logpath, "w") as log:
         for latexCmd in latexCmds:
-            if call(latexCmd, stdout=log, stderr=log):
-                return _errMsg(latexCmd[0], texpath)
-        # add to media
-        with open(png_or_svg, "rb") as file:
-            data = file.read()
-        col.media.write_data(extracted.filename, data)
-        os.unlink(png_or_svg)
-        return None
-    finally:
-        os.chdir(oldcwd)
-        log.close()
+            if call(latexCmd, stdout=log, stderr=log, cwd=dir, env=env):
+                # leave the folder in place so the user can inspect it
+                return None, _errMsg(latexCmd[0], texpath, logpath)
+    with open(os.path.join(dir, "tmp.%s" % ext), "rb") as file:
+        data = file.read()
+    shutil.rmtree(dir)
+    return data, None
 
 
-def _errMsg(type: str, texpath: str) -> Any:
+def _errMsg(type: str, texpath: str, logpath: str) -> Any:
     msg = (_("Error executing %s.") % type) + "<br>"
     msg += (_("Generated file: %s") % texpath) + "<br>"
     try:
-        with open(namedtmp("latex_log.txt", rm=False)) as f:
+        with open(logpath) as f:
             log = f.read()
         if not log:
             raise Exception()
@@ -11,11 +11,17 @@ import time
 import urllib.error
 import urllib.parse
 import urllib.request
-from typing import Any, Callable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import anki
 from anki.consts import *
-from anki.latex import render_latex, render_latex_returning_errors
+from anki.latex import (
+    LatexCache,
+    extract_latex,
+    latex_source,
+    render_latex,
+    render_latex_images,
+)
 from anki.rsbackend import pb
 from anki.utils import intTime
 
@@ -42,9 +48,35 @@ class MediaManager:
     ]
     regexps = soundRegexps + imgRegexps
 
+    # The patterns above combined into one, so that a string is only scanned
+    # once. Unlike applying them in turn, a tag that appears inside another
+    # tag's filename is not matched separately.
+    _mediaReg = re.compile(
+        r"""(?xi)
+        (
+            (?:
+                (?P<sound>\[sound:)
+                |
+                <img[^>]*\ src=(?:(?P<str>["'])|(?!["']))
+            )
+            (?P<fname>(?(sound)[^]]+|(?(str)[^>]+?|[^\ >]+)))
+            (?(sound)\]|(?(str)(?P=str)[^>]*>|[^>]*?>))
+        )"""
+    )
+    _imgReg = re.compile(
+        r"""(?xi)
+        (
+            <img[^>]*\ src=(?:(?P<str>["'])|(?!["']))
+            (?P<fname>(?(str)[^>]+?|[^\ >]+))
+            (?(str)(?P=str)[^>]*>|[^>]*?>)
+        )"""
+    )
+    _remoteReg = re.compile("(https?|ftp)://")
+
     def __init__(self, col: anki.collection.Collection, server: bool) -> None:
         self.col = col.weakref()
         self._dir: Optional[str] = None
+        self.latex_cache = LatexCache()
         if server:
             return
         # media directory
@@ -97,9 +129,11 @@ class MediaManager:
     def add_file(self, path: str) -> str:
         """Add basename of path to the media folder, renaming if not unique.
 
+        The file is hashed and copied without being read into memory.
         Returns possibly-renamed filename."""
-        with open(path, "rb") as f:
-            return self.write_data(os.path.basename(path), f.read())
+        return self.col.backend.add_media_file_from_path(
+            desired_name=os.path.basename(path), path=path
+        )
 
     def write_data(self, desired_fname: str, data: bytes) -> str:
         """Write the file to the media folder, renaming if not unique.
@@ -127,6 +161,7 @@ class MediaManager:
     def trash_files(self, fnames: List[str]) -> None:
         "Move provided files to the trash."
         self.col.backend.trash_media_files(fnames)
+        self.latex_cache.existing.difference_update(fnames)
 
     # String manipulation
     ##########################################################################
@@ -134,29 +169,47 @@ class MediaManager:
     def filesInStr(
         self, mid: int, string: str, includeRemote: bool = False
     ) -> List[str]:
+        # handle latex; all latex tags start with [
+        if "[" in string:
+            string = render_latex(string, self.col.models.get(mid), self.col)
+        return self._files_in_html(string, includeRemote)
+
+    def _files_in_html(self, string: str, include_remote: bool) -> List[str]:
         l = []
-        model = self.col.models.get(mid)
-        # handle latex
-        string = render_latex(string, model, self.col)
-        # extract filenames
-        for reg in self.regexps:
-            for match in re.finditer(reg, string):
-                fname = match.group("fname")
-                isLocal = not re.match("(https?|ftp)://", fname.lower())
-                if isLocal or includeRemote:
-                    l.append(fname)
+        for match in self._mediaReg.finditer(string):
+            fname = match.group("fname")
+            isLocal = not self._remoteReg.match(fname.lower())
+            if isLocal or include_remote:
+                l.append(fname)
         return l
 
+    def files_in_notes(
+        self,
+        notes: Iterable[Tuple[int, str]],
+        include_remote: bool = False,
+        rendered: bool = False,
+    ) -> List[str]:
+        """Filenames referenced by the provided (notetype id, fields) pairs,
+        without duplicates, in the order they were first seen.
+
+        If rendered is true, the text is the output of rendering a card, in
+        which LaTeX has already been replaced with images."""
+        files: Dict[str, None] = {}
+        for mid, flds in notes:
+            if rendered:
+                fnames = self._files_in_html(flds, include_remote)
+            else:
+                fnames = self.filesInStr(mid, flds, include_remote)
+            for fname in fnames:
+                files[fname] = None
+        return list(files)
+
     def transformNames(self, txt: str, func: Callable) -> Any:
-        for reg in self.regexps:
-            txt = re.sub(reg, func, txt)
-        return txt
+        return self._mediaReg.sub(func, txt)
 
     def strip(self, txt: str) -> str:
         "Return text with sound and image tags removed."
-        for reg in self.regexps:
-            txt = re.sub(reg, "", txt)
-        return txt
+        return self._mediaReg.sub("", txt)
 
     def escapeImages(self, string: str, unescape: bool = False) -> str:
         "Apply or remove percent encoding to image filenames."
@@ -169,53 +222,86 @@ class MediaManager:
         def repl(match):
             tag = match.group(0)
             fname = match.group("fname")
-            if re.match("(https?|ftp)://", fname):
+            if self._remoteReg.match(fname):
                 return tag
             return tag.replace(fname, fn(fname))
 
-        for reg in self.imgRegexps:
-            string = re.sub(reg, repl, string)
-        return string
+        return self._imgReg.sub(repl, string)
 
     # Checking media
     ##########################################################################
 
     def check(self) -> pb.CheckMediaOut:
         output = self.col.backend.check_media()
+        # files may have been renamed or moved to the trash
+        self.latex_cache.clear()
         # files may have been renamed on disk, so an undo at this point could
         # break file references
         self.col.save()
         return output
 
     def render_all_latex(
-        self, progress_cb: Optional[Callable[[int], bool]] = None
+        self,
+        progress_cb: Optional[Callable[[int], bool]] = None,
+        workers: Optional[int] = None,
     ) -> Optional[Tuple[int, str]]:
         """Render any LaTeX that is missing.
 
+        Images are rendered up to `workers` at a time (one per CPU by default),
+        and LaTeX that appears in multiple notes is only rendered once.
+
         If a progress callback is provided and it returns false, the operation
-        will be aborted.
+        will be aborted. It receives the number of notes checked, and then the
+        number of images rendered.
 
         If an error is encountered, returns (note_id, error_message)
         """
         last_progress = time.time()
+        # give LaTeX that previously failed another chance
+        self.latex_cache.failed.clear()
+
+        def should_continue(count: int) -> bool:
+            nonlocal last_progress
+            elap = time.time() - last_progress
+            if elap >= 0.3 and progress_cb is not None:
+                last_progress = intTime()
+                return progress_cb(count)
+            return True
+
+        # filename -> (latex, svg), and the first note that needs it
+        images: Dict[str, Tuple[str, bool]] = {}
+        first_nids: Dict[str, int] = {}
         checked = 0
         for (nid, mid, flds) in self.col.db.execute(
             "select id, mid, flds from notes where flds like '%[%'"
         ):
-
             model = self.col.models.get(mid)
-            _html, errors = render_latex_returning_errors(
-                flds, model, self.col, expand_clozes=True
-            )
-            if errors:
-                return (nid, "\n".join(errors))
+            for latex in extract_latex(flds, model, self.col, expand_clozes=True).latex:
+                if latex.filename in images or self.have(latex.filename):
+                    continue
+                images[latex.filename] = (
+                    latex_source(
+                        latex.latex_body, model["latexPre"], model["latexPost"]
+                    ),
+                    model.get("latexsvg", False),
+                )
+                first_nids[latex.filename] = nid
 
             checked += 1
-            elap = time.time() - last_progress
-            if elap >= 0.3 and progress_cb is not None:
-                last_progress = intTime()
-                if not progress_cb(checked):
-                    return None
+            if not should_continue(checked):
+                return None
+
+        if not anki.latex.build:
+            return None
+
+        rendered = 0
+        for fname, err in render_latex_images(self.col, images, workers):
+            if err:
+                return (first_nids[fname], err)
+
+            rendered += 1
+            if not should_continue(rendered):
+                return None
 
         return None
 
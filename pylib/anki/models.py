@@ -227,6 +227,7 @@ class ModelManager:
     def update(self, m: NoteType, preserve_usn=True) -> None:
         "Add or update an existing model. Use .save() instead."
         self._remove_from_cache(m["id"])
+        self.col.render_cache.clear()
         self.ensureNameUnique(m)
         m["id"] = self.col.backend.add_or_update_notetype(
             json=to_json_bytes(m), preserve_usn_and_mtime=preserve_usn
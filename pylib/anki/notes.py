@@ -65,7 +65,8 @@ class Note:
 
     def flush(self) -> None:
         assert self.id != 0
-        self.col.backend.update_note(self.to_backend_note())
+        with self.col.render_cache.updating_note(self.id):
+            self.col.backend.update_note(self.to_backend_note())
 
     def __repr__(self) -> str:
         d = dict(self.__dict__)
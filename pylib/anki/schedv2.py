@@ -310,6 +310,20 @@ order by due"""
         # collapse or finish
         return self._getLrnCard(collapse=True)
 
+    def upcoming_card_ids(self, limit: int = 1) -> List[int]:
+        """Ids of cards likely to be shown soon, taken from the front of each
+        queue that has been filled. The queues are not changed.
+
+        This is only a guess: which queue the next card comes from, and
+        whether learning cards are due, depends on when cards are answered."""
+        if not self._haveQueues:
+            return []
+        ids = [id for due, id in nsmallest(limit, self._lrnQueue)]
+        for queue in (self._newQueue, self._lrnDayQueue, self._revQueue):
+            # cards are popped from the end
+            ids.extend(reversed(queue[-limit:]))
+        return list(dict.fromkeys(ids))
+
     # New cards
     ##########################################################################
 
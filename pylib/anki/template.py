@@ -28,8 +28,10 @@ template_legacy.py file, using the legacy addHook() system.
 
 from __future__ import annotations
 
+import dataclasses
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import anki
 from anki import hooks
@@ -135,16 +137,20 @@ class TemplateRenderContext:
     def __init__(
         self,
         col: anki.collection.Collection,
-        card: Card,
-        note: Note,
+        card: Optional[Card],
+        note: Optional[Note],
         browser: bool = False,
         notetype: NoteType = None,
         template: Optional[Dict] = None,
         fill_empty: bool = False,
+        card_id: Optional[int] = None,
     ) -> None:
         self._col = col.weakref()
         self._card = card
         self._note = note
+        # when rendering in bulk, the card and note are only loaded if a
+        # filter or hook asks for them
+        self._card_id = card.id if card else card_id
         self._browser = browser
         self._template = template
         self._fill_empty = fill_empty
@@ -164,19 +170,21 @@ class TemplateRenderContext:
     def fields(self) -> Dict[str, str]:
         print(".fields() is obsolete, use .note() or .card()")
         if not self._fields:
+            note = self.note()
+            card = self.card()
             # fields from note
-            fields = dict(self._note.items())
+            fields = dict(note.items())
 
             # add (most) special fields
-            fields["Tags"] = self._note.stringTags().strip()
+            fields["Tags"] = note.stringTags().strip()
             fields["Type"] = self._note_type["name"]
-            fields["Deck"] = self._col.decks.name(self._card.odid or self._card.did)
+            fields["Deck"] = self._col.decks.name(card.odid or card.did)
             fields["Subdeck"] = DeckManager.basename(fields["Deck"])
             if self._template:
                 fields["Card"] = self._template["name"]
             else:
                 fields["Card"] = ""
-            flag = self._card.userFlag()
+            flag = card.userFlag()
             fields["CardFlag"] = flag and f"flag{flag}" or ""
             self._fields = fields
 
@@ -187,9 +195,13 @@ class TemplateRenderContext:
 
         Be careful not to call .q() or .a() on the card, or you'll create an
         infinite loop."""
+        if not self._card:
+            self._card = self._col.getCard(self._card_id)
         return self._card
 
     def note(self) -> Note:
+        if not self._note:
+            self._note = self.card().note()
         return self._note
 
     def note_type(self) -> NoteType:
@@ -207,13 +219,12 @@ class TemplateRenderContext:
         try:
             partial = self._partially_render()
         except anki.rsbackend.TemplateError as e:
-            return TemplateRenderOutput(
-                question_text=str(e),
-                answer_text=str(e),
-                question_av_tags=[],
-                answer_av_tags=[],
-            )
+            return TemplateRenderOutput.from_template_error(str(e))
 
+        return self.complete_render(partial)
+
+    def complete_render(self, partial: PartiallyRenderedCard) -> TemplateRenderOutput:
+        "Apply custom filters and extract AV tags from an already rendered card."
         qtext = apply_custom_filters(partial.qnodes, self, front_side=None)
         qout = self.col().backend.extract_av_tags(text=qtext, question_side=True)
 
@@ -245,7 +256,7 @@ class TemplateRenderContext:
         else:
             # existing card (eg study mode)
             out = self._col.backend.render_existing_card(
-                card_id=self._card.id, browser=self._browser
+                card_id=self._card_id, browser=self._browser
             )
         return PartiallyRenderedCard.from_proto(out)
 
@@ -259,6 +270,15 @@ class TemplateRenderOutput:
     answer_av_tags: List[AVTag]
     css: str = ""
 
+    @staticmethod
+    def from_template_error(error: str) -> TemplateRenderOutput:
+        return TemplateRenderOutput(
+            question_text=error,
+            answer_text=error,
+            question_av_tags=[],
+            answer_av_tags=[],
+        )
+
     def question_and_style(self) -> str:
         return f"<style>{self.css}</style>{self.question_text}"
 
@@ -266,6 +286,117 @@ class TemplateRenderOutput:
         return f"<style>{self.css}</style>{self.answer_text}"
 
 
+class TemplateRenderCache:
+    """Keeps the output of recently rendered cards, so a card that is shown
+    again without changes is not rendered a second time.
+
+    The backend counts the times it writes cards, notes or notetypes, and
+    the whole cache is discarded when that count moves on, so bulk
+    operations such as changing decks or tags, find and replace, and
+    notetype edits are always picked up. Other changes, such as the deck
+    statistics updated when a card is answered, leave the cache alone.
+    Saving a single card or note through updating_note() only discards
+    that note's entries. Entries are also keyed on the card, note and
+    notetype modification times, to catch changes made with raw SQL.
+
+    Callers are given a copy of the cached output, which they may modify.
+
+    As the card_did_render hook runs as part of rendering, it is not run
+    again when a card is returned from the cache. Its changes are kept in
+    the cached output."""
+
+    capacity = 500
+
+    def __init__(self, backend: anki.rsbackend.RustBackend) -> None:
+        self._backend = backend
+        # (card id, note id, card mod, note mod, notetype mod, browser) -> output
+        self._outputs: Dict[
+            Tuple[int, int, int, int, int, bool], TemplateRenderOutput
+        ] = {}
+        # backend content change count the entries are valid for
+        self._change_count: Optional[int] = None
+
+    def render(
+        self, card: Card, browser: bool = False, reload: bool = False
+    ) -> TemplateRenderOutput:
+        "Return the card's output, rendering it if needed or if reload is true."
+        self._check_change_count()
+        note = card.note()
+        key = (card.id, note.id, card.mod, note.mod, card.note_type()["mod"], browser)
+        output = self._outputs.pop(key, None)
+        if output is None or reload:
+            output = TemplateRenderContext.from_existing_card(card, browser).render()
+            if len(self._outputs) >= self.capacity:
+                # drop the least recently used entry
+                del self._outputs[next(iter(self._outputs))]
+        self._outputs[key] = output
+        return _copy_output(output)
+
+    @contextmanager
+    def updating_note(self, note_id: int) -> Iterator[None]:
+        """Wrap the saving of a single card or note. Entries for the note are
+        discarded, and other entries are kept unless something else changed
+        since the cache was last checked."""
+        self._check_change_count()
+        yield
+        self.forget_note(note_id)
+        self._change_count = self._backend.get_content_change_count()
+
+    def forget_note(self, note_id: int) -> None:
+        for key in [key for key in self._outputs if key[1] == note_id]:
+            del self._outputs[key]
+
+    def clear(self) -> None:
+        self._outputs.clear()
+
+    def _check_change_count(self) -> None:
+        count = self._backend.get_content_change_count()
+        if count != self._change_count:
+            self._outputs.clear()
+            self._change_count = count
+
+
+def _copy_output(output: TemplateRenderOutput) -> TemplateRenderOutput:
+    return dataclasses.replace(
+        output,
+        question_av_tags=list(output.question_av_tags),
+        answer_av_tags=list(output.answer_av_tags),
+    )
+
+
+def render_existing_cards(
+    col: anki.collection.Collection, card_ids: Sequence[int], browser: bool = False
+) -> List[TemplateRenderOutput]:
+    """Render multiple existing cards, in the order provided.
+
+    The templates of all cards are rendered in a single backend call, and
+    cards and notes are only loaded if an add-on filter or hook needs them.
+    A template error in one card is returned as that card's output, as with
+    Card.render_output()."""
+    results = []
+    for card_id, rendered in zip(
+        card_ids,
+        col.backend.render_existing_cards(card_ids=card_ids, browser=browser),
+    ):
+        if rendered.template_error:
+            results.append(
+                TemplateRenderOutput.from_template_error(rendered.template_error)
+            )
+            continue
+        ctx = TemplateRenderContext(
+            col,
+            card=None,
+            note=None,
+            browser=browser,
+            notetype=col.models.get(rendered.notetype_id),
+            card_id=card_id,
+        )
+        results.append(
+            ctx.complete_render(PartiallyRenderedCard.from_proto(rendered.output))
+        )
+    return results
+
+
 # legacy
 def templates_for_card(card: Card, browser: bool) -> Tuple[str, str]:
     template = card.template()
@@ -288,29 +419,36 @@ def apply_custom_filters(
     if len(rendered) == 1 and isinstance(rendered[0], str):
         return rendered[0]
 
-    res = ""
+    res: List[str] = []
+    # only fetched if a legacy filter needs it
+    note_items: Optional[List[Tuple[Any, Any]]] = None
     for node in rendered:
         if isinstance(node, str):
-            res += node
-        else:
-            # do we need to inject in FrontSide?
-            if node.field_name == "FrontSide" and front_side is not None:
-                node.current_text = front_side
-
-            field_text = node.current_text
-            for filter_name in node.filters:
-                field_text = hooks.field_filter(
-                    field_text, node.field_name, filter_name, ctx
-                )
-                # legacy hook - the second and fifth argument are no longer used.
+            res.append(node)
+            continue
+
+        # do we need to inject in FrontSide?
+        if node.field_name == "FrontSide" and front_side is not None:
+            node.current_text = front_side
+
+        field_text = node.current_text
+        for filter_name in node.filters:
+            field_text = hooks.field_filter(
+                field_text, node.field_name, filter_name, ctx
+            )
+            # legacy hook - the second and fifth argument are no longer used.
+            legacy_hook = "fmod_" + filter_name
+            if anki.hooks.hasHook(legacy_hook):
+                if note_items is None:
+                    note_items = ctx.note().items()
                 field_text = anki.hooks.runFilter(
-                    "fmod_" + filter_name,
+                    legacy_hook,
                     field_text,
                     "",
-                    ctx.note().items(),
+                    note_items,
                     node.field_name,
                     "",
                 )
 
-            res += field_text
-    return res
+        res.append(field_text)
+    return "".join(res)
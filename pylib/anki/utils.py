@@ -284,7 +284,10 @@ def noBundledLibs() -> Iterator[None]:
 
 
 def call(argv: List[str], wait: bool = True, **kwargs) -> int:
-    "Execute a command. If WAIT, return exit code."
+    """Execute a command. If WAIT, return exit code.
+
+    If an env argument is provided, it is used as-is, and the process
+    environment is left untouched, so this is safe to call from threads."""
     # ensure we don't open a separate window for forking process on windows
     if isWin:
         si = subprocess.STARTUPINFO()  # type: ignore
@@ -297,8 +300,11 @@ def call(argv: List[str], wait: bool = True, **kwargs) -> int:
         si = None
     # run
     try:
-        with noBundledLibs():
+        if "env" in kwargs:
             o = subprocess.Popen(argv, startupinfo=si, **kwargs)
+        else:
+            with noBundledLibs():
+                o = subprocess.Popen(argv, startupinfo=si, **kwargs)
     except OSError:
         # command not found
         return -1
@@ -0,0 +1,71 @@
+# coding: utf-8
+
+import io
+import os
+import tempfile
+
+from anki.backups import BackupStore
+
+
+def test_backups():
+    dir = tempfile.mkdtemp(prefix="anki")
+    store = BackupStore(os.path.join(dir, "backups"))
+    os.mkdir(store.folder)
+    store.chunk_size = 4
+    path = os.path.join(dir, "collection.anki2")
+
+    def chunk_count():
+        return sum(len(files) for _, _, files in os.walk(store.chunk_folder))
+
+    with open(path, "wb") as file:
+        file.write(b"aaaabbbbaaaacc")
+    first = store.add(path, "backup-2020-01-01-00.00.00")
+    # the repeated chunk is only stored once
+    assert chunk_count() == 3
+
+    # changing one chunk only adds one chunk
+    with open(path, "wb") as file:
+        file.write(b"aaaabbbbddddcc")
+    second = store.add(path, "backup-2020-01-02-00.00.00")
+    assert chunk_count() == 4
+    assert store.backups() == [first, second]
+
+    # backups can be restored
+    out = io.BytesIO()
+    store.restore(first, out)
+    assert out.getvalue() == b"aaaabbbbaaaacc"
+
+    # removing a backup frees the chunks that only it used
+    store.remove(second)
+    store.remove_unused_chunks()
+    assert store.backups() == [first]
+    assert chunk_count() == 3
+
+
+def test_prune_periodic():
+    dir = tempfile.mkdtemp(prefix="anki")
+    store = BackupStore(dir)
+    path = os.path.join(dir, "collection.anki2")
+    with open(path, "wb") as file:
+        file.write(b"data")
+
+    # backups taken on close, including one made by an older version
+    open(os.path.join(dir, "backup-2020-01-01-00.00.00.colpkg"), "wb").close()
+    daily = store.add(path, "backup-2020-01-02-00.00.00")
+    # followed by a long session of periodic backups
+    periodic = []
+    for minute in range(10):
+        periodic.append(
+            store.add(path, "backup-2020-01-03-00.%02d.00-periodic" % minute)
+        )
+        store.prune(2, 3)
+        # which never push out the backups taken on close
+        assert os.path.exists(os.path.join(dir, "backup-2020-01-01-00.00.00.colpkg"))
+        assert daily in store.backups()
+
+    assert store.backups() == [daily] + periodic[-3:]
+
+    # both kinds are limited separately
+    store.prune(1, 1)
+    assert not os.path.exists(os.path.join(dir, "backup-2020-01-01-00.00.00.colpkg"))
+    assert store.backups() == [daily, periodic[-1]]
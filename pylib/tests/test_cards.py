@@ -1,5 +1,6 @@
 # coding: utf-8
 
+from anki import hooks
 from tests.shared import getEmptyCol
 
 
@@ -31,6 +32,39 @@ def test_misc():
     assert c.template()["ord"] == 0
 
 
+def test_render_cache():
+    col = getEmptyCol()
+    m = col.models.current()
+    m["tmpls"][0]["qfmt"] = "{{Front}} {{Tags}}"
+    col.models.save(m)
+    note = col.newNote()
+    note["Front"] = "one"
+    note["Back"] = "2"
+    col.addNote(note)
+    output = note.cards()[0].render_output()
+    # callers are given their own copy of the cached output
+    output.question_text = "changed"
+    assert "one" in note.cards()[0].render_output().question_text
+    # changes to the note are picked up
+    note["Front"] = "two"
+    note.flush()
+    assert "two" in note.cards()[0].q()
+    # as are bulk changes made by the backend in the same second
+    col.tags.bulkAdd([note.id], "foo")
+    assert "foo" in note.cards()[0].q()
+    # changes that don't touch cards or notes, such as deck stats, keep it
+    rendered = []
+
+    def onRender(output, ctx):
+        rendered.append(1)
+
+    hooks.card_did_render.append(onRender)
+    col.sched.update_stats(1, new_delta=1)
+    note.cards()[0].q()
+    hooks.card_did_render.remove(onRender)
+    assert not rendered
+
+
 def test_genrem():
     col = getEmptyCol()
     note = col.newNote()
@@ -44,6 +44,28 @@ def test_create_open():
     os.unlink(newPath)
 
 
+def test_backup_to():
+    col = getEmptyCol()
+    note = col.newNote()
+    note["Front"] = "one"
+    col.addNote(note)
+    (fd, path) = tempfile.mkstemp(suffix=".anki2")
+    os.close(fd)
+    os.unlink(path)
+    col.save()
+    # unsaved changes are not included, and the collection stays open
+    note["Front"] = "two"
+    note.flush()
+    col.backup_to(path)
+    assert col.getNote(note.id)["Front"] == "two"
+    col.close()
+    col = aopen(path)
+    assert col.noteCount() == 1
+    assert col.getNote(note.id)["Front"] == "one"
+    col.close()
+    os.unlink(path)
+
+
 def test_noteAddDelete():
     col = getEmptyCol()
     # add a note
@@ -130,6 +130,19 @@ def test_findCards():
         col.find_cards("", order=BuiltinSortKind.CARD_DUE, reverse=True)[0]
         != firstCardId
     )
+    # rendered question and answer
+    assert (
+        col.find_cards("", order=BuiltinSortKind.CARD_QUESTION, reverse=False)[0]
+        == catCard.id
+    )
+    assert (
+        col.find_cards("", order=BuiltinSortKind.CARD_QUESTION, reverse=True)[0]
+        == latestCardIds[0]
+    )
+    assert (
+        col.find_cards("", order=BuiltinSortKind.CARD_ANSWER, reverse=False)[0]
+        == firstCardId
+    )
     # model
     assert len(col.findCards("note:basic")) == 3
     assert len(col.findCards("-note:basic")) == 2
@@ -182,6 +182,49 @@ def test_csv():
     col.close()
 
 
+def test_csv_batches():
+    col = getEmptyCol()
+    file = str(os.path.join(testDir, "support/text-2fields.txt"))
+    i = TextImporter(col, file)
+    i.initMapping()
+    i.batchSize = 2
+    counts = []
+    i.progressCallback = counts.append
+    i.run()
+    # same result as importing in one go
+    assert len(i.log) == 5
+    assert i.total == 5
+    assert counts == [2, 4, 5]
+    assert col.cardCount() == 5
+    # duplicates in later batches are still detected
+    i.run()
+    assert len(i.log) == 10
+    assert i.total == 5
+    assert col.cardCount() == 5
+    col.close()
+
+
+def test_csv_multiline_first_record():
+    col = getEmptyCol()
+    # the first record is preceded by blank lines, and its quoted field
+    # spans more lines than are read to detect the format
+    front = "\n".join(str(x) for x in range(15))
+    with NamedTemporaryFile(mode="w", delete=False) as tf:
+        tf.write('\n\n"%s",back\nfront2,back2\n' % front)
+        tf.flush()
+        i = TextImporter(col, tf.name)
+        i.initMapping()
+        i.run()
+        clear_tempfile(tf)
+    assert i.numFields == 2
+    assert i.total == 2
+    assert col.findNotes("back2")
+    assert col.getNote(col.findNotes("back -back2")[0])["Front"] == front.replace(
+        "\n", "<br>"
+    )
+    col.close()
+
+
 def test_csv2():
     col = getEmptyCol()
     mm = col.models
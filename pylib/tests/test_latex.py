@@ -22,6 +22,10 @@ def test_latex():
     msg = note.cards()[0].q()
     assert "executing nolatex" in msg
     assert "installed" in msg
+    # rendering all latex reports the note that failed
+    (nid, msg) = col.media.render_all_latex(workers=2)
+    assert nid == note.id
+    assert "executing nolatex" in msg
     # check if we have latex installed, and abort test if we don't
     if not shutil.which("latex") or not shutil.which("dvipng"):
         print("aborting test; latex or dvipng is not installed")
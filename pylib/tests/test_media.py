@@ -42,6 +42,19 @@ def test_strings():
         "fo",
     ]
     assert mf(mid, "aou[sound:foo.mp3]aou") == ["foo.mp3"]
+    # references are returned in the order they appear
+    assert mf(mid, "[sound:foo.mp3]<img src=bar.jpg>[sound:baz.mp3]") == [
+        "foo.mp3",
+        "bar.jpg",
+        "baz.mp3",
+    ]
+    assert col.media.files_in_notes(
+        [(mid, "<img src=one>[sound:two]"), (mid, "<img src=two><img src=one>")]
+    ) == ["one", "two"]
+    # rendered card text is not checked for LaTeX
+    assert col.media.files_in_notes(
+        [(mid, "[$]x[/$]<img src=one>")], rendered=True
+    ) == ["one"]
     sp = col.media.strip
     assert sp("aoeu") == "aoeu"
     assert sp("aoeu[sound:foo.mp3]aoeu") == "aoeuaoeu"
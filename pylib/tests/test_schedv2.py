@@ -80,6 +80,45 @@ def test_new():
     #     col.sched.answerCard(c, 2)
 
 
+def test_upcoming():
+    col = getEmptyCol()
+    for i in range(2):
+        note = col.newNote()
+        note["Front"] = str(i)
+        col.addNote(note)
+    col.reset()
+    c = col.sched.getCard()
+    upcoming = col.sched.upcoming_card_ids()
+    assert c.id not in upcoming
+    assert col.sched.getCard().id in upcoming
+
+
+def test_prerendered_card_kept():
+    col = getEmptyCol()
+    for i in range(2):
+        note = col.newNote()
+        note["Front"] = str(i)
+        col.addNote(note)
+    col.reset()
+    c = col.sched.getCard()
+    # render the next card ahead of time, as the reviewer does
+    nextId = col.sched.upcoming_card_ids()[0]
+    col.getCard(nextId).render_output()
+    rendered = []
+
+    def onRender(output, ctx):
+        rendered.append(1)
+
+    hooks.card_did_render.append(onRender)
+    col.sched.answerCard(c, 3)
+    c = col.sched.getCard()
+    assert c.id == nextId
+    c.q()
+    hooks.card_did_render.remove(onRender)
+    # answering the first card didn't discard the second one
+    assert not rendered
+
+
 def test_newLimits():
     col = getEmptyCol()
     # add some notes
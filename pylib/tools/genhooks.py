@@ -63,7 +63,10 @@ hooks = [
             "output: anki.template.TemplateRenderOutput",
             "ctx: anki.template.TemplateRenderContext",
         ],
-        doc="Can modify the resulting text after rendering completes.",
+        doc="""Can modify the resulting text after rendering completes.
+
+        Rendered output is cached, so this is not called again when an
+        unchanged card is shown a second time.""",
     ),
     Hook(
         name="schedv2_did_answer_review_card",
@@ -5,12 +5,26 @@
 from __future__ import annotations
 
 import html
+import itertools
 import re
 import time
 from dataclasses import dataclass
 from enum import Enum
 from operator import itemgetter
-from typing import Callable, List, Optional, Sequence, Tuple, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 import anki
 import aqt
@@ -23,7 +37,7 @@ from anki.models import NoteType
 from anki.notes import Note
 from anki.rsbackend import TR, DeckTreeNode, InvalidInput
 from anki.stats import CardStats
-from anki.utils import htmlToTextLine, ids2str, isMac, isWin
+from anki.utils import htmlToTextLine, ids2str, isMac, isWin, splitFields
 from aqt import AnkiQt, gui_hooks
 from aqt.editor import Editor
 from aqt.exporting import ExportDialog
@@ -83,7 +97,23 @@ class SearchContext:
 ##########################################################################
 
 
+@dataclass
+class BrowserRow:
+    "The text of each active column for one card, and what is needed to paint it."
+    cells: List[Optional[str]]
+    flag: int
+    marked: bool
+    suspended: bool
+    rtl: bool
+    template: Dict[str, Any]
+
+
 class DataModel(QAbstractTableModel):
+    # rows are fetched from the collection this many at a time
+    rowPageSize = 200
+    # upper bound on the number of rendered questions and answers kept
+    maxRenders = 5000
+
     def __init__(self, browser: Browser):
         QAbstractTableModel.__init__(self)
         self.browser = browser
@@ -93,7 +123,24 @@ class DataModel(QAbstractTableModel):
             "activeCols", ["noteFld", "template", "cardDue", "deck"]
         )
         self.cards: Sequence[int] = []
+        # in notes mode, each row shows a note, represented by the first of its
+        # cards in the search order, and noteIds holds the note of each row
+        self.notesMode = self.col.get_config("browserNotesMode", False)
+        self.noteIds: Sequence[int] = []
+        self.selectedRanges: List[Tuple[int, int]] = []
+        self.selectedCards: Set[int] = set()
+        self.selectionRows: Sequence[int] = []
+        self.focusedCard: Optional[int] = None
+        # the focused card's row when it was saved, checked before searching
+        self.focusedRow: Optional[int] = None
         self.cardObjs: Dict[int, Card] = {}
+        # rows fetched since the last reset, keyed on card id; None if the
+        # card no longer exists
+        self.rows: Dict[int, Optional[BrowserRow]] = {}
+        # rendered question and answer text, keyed on card id. They survive
+        # resets, and are reused while the card, note and notetype mtimes
+        # are unchanged.
+        self._renders: Dict[int, Tuple[Tuple[int, int, int], str, str]] = {}
 
     def getCard(self, index: QModelIndex) -> Card:
         id = self.cards[index.row()]
@@ -101,11 +148,23 @@ class DataModel(QAbstractTableModel):
             self.cardObjs[id] = self.col.getCard(id)
         return self.cardObjs[id]
 
+    def getRow(self, index: QModelIndex) -> Optional[BrowserRow]:
+        """The row for index, fetching the page of rows around it if necessary.
+        None if the card has been deleted."""
+        id = self.cards[index.row()]
+        if id not in self.rows:
+            start = index.row() - index.row() % self.rowPageSize
+            page = self.cards[start : start + self.rowPageSize]
+            self._fetchRows([cid for cid in page if cid not in self.rows])
+        return self.rows.get(id)
+
     def refreshNote(self, note):
         refresh = False
-        for c in note.cards():
-            if c.id in self.cardObjs:
-                del self.cardObjs[c.id]
+        for cid in self.col.card_ids_of_note(note.id):
+            self._renders.pop(cid, None)
+            if cid in self.cardObjs or cid in self.rows:
+                self.cardObjs.pop(cid, None)
+                self.rows.pop(cid, None)
                 refresh = True
         if refresh:
             self.layoutChanged.emit()  # type: ignore
@@ -129,9 +188,10 @@ class DataModel(QAbstractTableModel):
         if role == Qt.FontRole:
             if self.activeCols[index.column()] not in ("question", "answer", "noteFld"):
                 return
-            row = index.row()
-            c = self.getCard(index)
-            t = c.template()
+            row = self.getRow(index)
+            if not row:
+                return
+            t = row.template
             if not t.get("bfont"):
                 return
             f = QFont()
@@ -183,6 +243,7 @@ class DataModel(QAbstractTableModel):
     def search(self, txt: str) -> None:
         self.beginReset()
         self.cards = []
+        self.noteIds = []
         error_message: Optional[str] = None
         try:
             ctx = SearchContext(search=txt, browser=self.browser)
@@ -191,6 +252,8 @@ class DataModel(QAbstractTableModel):
                 ctx.card_ids = self.col.find_cards(ctx.search, order=ctx.order)
             gui_hooks.browser_did_search(ctx)
             self.cards = ctx.card_ids
+            if self.notesMode:
+                self.cards, self.noteIds = self._firstCardOfEachNote(self.cards)
         except Exception as e:
             error_message = str(e)
         finally:
@@ -199,6 +262,22 @@ class DataModel(QAbstractTableModel):
         if error_message:
             showWarning(error_message)
 
+    def _firstCardOfEachNote(self, cids: Sequence[int]) -> Tuple[List[int], List[int]]:
+        "Keep the first card of each note, returning the cards and their notes."
+        nids = dict(
+            self.col.db.all("select id, nid from cards where id in " + ids2str(cids))
+        )
+        cards = []
+        notes = []
+        seen = set()
+        for cid in cids:
+            nid = nids[cid]
+            if nid not in seen:
+                seen.add(nid)
+                cards.append(cid)
+                notes.append(nid)
+        return cards, notes
+
     def reset(self):
         self.beginReset()
         self.endReset()
@@ -210,6 +289,7 @@ class DataModel(QAbstractTableModel):
         self.saveSelection()
         self.beginResetModel()
         self.cardObjs = {}
+        self.rows = {}
 
     def endReset(self):
         self.endResetModel()
@@ -222,63 +302,103 @@ class DataModel(QAbstractTableModel):
     def _reverse(self):
         self.beginReset()
         self.cards = list(reversed(self.cards))
+        self.noteIds = list(reversed(self.noteIds))
         self.endReset()
 
     def saveSelection(self):
-        cards = self.browser.selectedCards()
-        self.selectedCards = dict([(id, True) for id in cards])
+        # the selection is kept as ranges of rows, and the ids in them so it
+        # can be mapped onto the rows of a new search
+        selection = self.browser.form.tableView.selectionModel().selection()
+        self.selectedRanges = [(r.top(), r.bottom()) for r in selection]
+        self.selectedCards = set()
+        for top, bottom in self.selectedRanges:
+            self.selectedCards.update(self.cards[top : bottom + 1])
+        self.selectionRows = self.cards
         if getattr(self.browser, "card", None):
             self.focusedCard = self.browser.card.id
+            self.focusedRow = self.browser.form.tableView.currentIndex().row()
         else:
             self.focusedCard = None
+            self.focusedRow = None
 
     def restoreSelection(self):
         if not self.cards:
             return
         sm = self.browser.form.tableView.selectionModel()
         sm.clear()
-        # restore selection
-        items = QItemSelection()
-        count = 0
-        firstIdx = None
-        focusedIdx = None
-        for row, id in enumerate(self.cards):
-            # if the id matches the focused card, note the index
-            if self.focusedCard == id:
-                focusedIdx = self.index(row, 0)
-                items.select(focusedIdx, focusedIdx)
-                self.focusedCard = None
-            # if the card was previously selected, select again
-            if id in self.selectedCards:
-                count += 1
-                idx = self.index(row, 0)
-                items.select(idx, idx)
-                # note down the first card of the selection, in case we don't
-                # have a focused card
-                if not firstIdx:
-                    firstIdx = idx
+
+        # the rows of all cards are only looked up if the selected or focused
+        # cards have moved
+        rowOf: Optional[Dict[int, int]] = None
+        if self._rangesUnchanged():
+            ranges = self.selectedRanges
+        else:
+            rowOf = self._rowIndex()
+            ranges = self._rowRanges(
+                rowOf[id] for id in self.selectedCards if id in rowOf
+            )
+
         # focus previously focused or first in selection
-        idx = focusedIdx or firstIdx
+        focusedRow = None
+        if self.focusedCard is not None:
+            row = self.focusedRow
+            if row is not None and row < len(self.cards):
+                if self.cards[row] == self.focusedCard:
+                    focusedRow = row
+            if focusedRow is None:
+                if rowOf is None:
+                    rowOf = self._rowIndex()
+                focusedRow = rowOf.get(self.focusedCard)
+            self.focusedCard = None
+            self.focusedRow = None
+        if focusedRow is None and ranges:
+            focusedRow = min(top for top, bottom in ranges)
+
         tv = self.browser.form.tableView
-        if idx:
-            row = idx.row()
-            pos = tv.rowViewportPosition(row)
-            visible = pos >= 0 and pos < tv.viewport().height()
-            tv.selectRow(row)
-
-            # we save and then restore the horizontal scroll position because
-            # scrollTo() also scrolls horizontally which is confusing
-            if not visible:
-                h = tv.horizontalScrollBar().value()
-                tv.scrollTo(idx, tv.PositionAtCenter)
-                tv.horizontalScrollBar().setValue(h)
-            if count < 500:
-                # discard large selections; they're too slow
-                sm.select(
-                    items, QItemSelectionModel.SelectCurrent | QItemSelectionModel.Rows
-                )
-        else:
+        if focusedRow is None:
             tv.selectRow(0)
+            return
+
+        items = QItemSelection()
+        for top, bottom in ranges:
+            items.select(self.index(top, 0), self.index(bottom, 0))
+        idx = self.index(focusedRow, 0)
+        items.select(idx, idx)
+
+        pos = tv.rowViewportPosition(focusedRow)
+        visible = pos >= 0 and pos < tv.viewport().height()
+        tv.selectRow(focusedRow)
+
+        # we save and then restore the horizontal scroll position because
+        # scrollTo() also scrolls horizontally which is confusing
+        if not visible:
+            h = tv.horizontalScrollBar().value()
+            tv.scrollTo(idx, tv.PositionAtCenter)
+            tv.horizontalScrollBar().setValue(h)
+        sm.select(items, QItemSelectionModel.SelectCurrent | QItemSelectionModel.Rows)
+
+    def _rangesUnchanged(self) -> bool:
+        "True if the selected cards are still in the rows they were saved from."
+        if self.cards is self.selectionRows:
+            return True
+        return all(
+            self.cards[top : bottom + 1] == self.selectionRows[top : bottom + 1]
+            for top, bottom in self.selectedRanges
+        )
+
+    def _rowIndex(self) -> Dict[int, int]:
+        "Map of card id to row."
+        return dict(zip(self.cards, range(len(self.cards))))
+
+    def _rowRanges(self, rows: Iterable[int]) -> List[Tuple[int, int]]:
+        "Merge rows into (top, bottom) ranges of adjacent rows."
+        ranges: List[Tuple[int, int]] = []
+        for row in sorted(rows):
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1] = (ranges[-1][0], row)
+            else:
+                ranges.append((row, row))
+        return ranges
 
     # Column data
     ######################################################################
@@ -290,91 +410,250 @@ class DataModel(QAbstractTableModel):
         return "%Y-%m-%d"
 
     def columnData(self, index):
-        row = index.row()
-        col = index.column()
-        type = self.columnType(col)
-        c = self.getCard(index)
-        if type == "question":
-            return self.question(c)
-        elif type == "answer":
-            return self.answer(c)
-        elif type == "noteFld":
-            f = c.note()
-            return htmlToTextLine(f.fields[self.col.models.sortIdx(f.model())])
-        elif type == "template":
-            t = c.template()["name"]
-            if c.model()["type"] == MODEL_CLOZE:
-                t = f"{t} {c.ord + 1}"
-            return t
+        row = self.getRow(index)
+        if not row:
+            return ""
+        return row.cells[index.column()]
+
+    def _fetchRows(self, ids: Sequence[int]) -> None:
+        """Build the rows of the provided cards. The card and note data is
+        read in a single query, and any questions and answers that are
+        needed are rendered in a single batch."""
+        if not ids:
+            return
+        data = self.col.db.all(
+            "select c.id, c.did, c.odid, c.ord, c.mod, c.type, c.queue, c.due, "
+            "c.ivl, c.factor, c.reps, c.lapses, c.flags, n.id, n.mid, n.mod, "
+            "n.tags, n.flds from cards c, notes n where c.nid = n.id and c.id in "
+            + ids2str(ids)
+        )
+        renders = {}
+        if "question" in self.activeCols or "answer" in self.activeCols:
+            renders = self._questionsAndAnswers(data)
+        aggregates = {}
+        if self.notesMode:
+            aggregates = self._noteAggregates([d[13] for d in data])
+        for id in ids:
+            self.rows[id] = None
+        for d in data:
+            self.rows[d[0]] = self._buildRow(d, renders, aggregates.get(d[13]))
+
+    def _noteAggregates(self, nids: Sequence[int]) -> Dict[int, Sequence]:
+        "Totals and averages over all cards of the provided notes, in a single query."
+        return {
+            row[0]: row[1:]
+            for row in self.col.db.all(
+                f"""
+select nid, count(), sum(reps), sum(lapses), max(mod),
+avg(case when type != {CARD_TYPE_NEW} then factor end),
+avg(case when type = {CARD_TYPE_REV} then ivl end),
+min(case when queue in ({QUEUE_TYPE_REV}, {QUEUE_TYPE_DAY_LEARN_RELEARN}) then due end),
+count(distinct did), sum(queue = {QUEUE_TYPE_SUSPENDED})
+from cards where nid in %s group by nid"""
+                % ids2str(nids)
+            )
+        }
+
+    def _questionsAndAnswers(self, data: List[Sequence]) -> Dict[int, Tuple[str, str]]:
+        "Rendered question and answer text of each card, reusing earlier renders."
+        renders = {}
+        stale = []
+        for d in data:
+            cid = d[0]
+            mods = (d[4], d[15], self.col.models.get(d[14])["mod"])
+            cached = self._renders.get(cid)
+            if cached and cached[0] == mods:
+                renders[cid] = cached[1:]
+            else:
+                stale.append((cid, mods))
+        if not stale:
+            return renders
+
+        if len(self._renders) > self.maxRenders:
+            self._renders = {}
+        outputs = self.col.render_cards([cid for cid, _ in stale], browser=True)
+        for (cid, mods), output in zip(stale, outputs):
+            q = htmlToTextLine(output.question_and_style())
+            a = htmlToTextLine(output.answer_and_style())
+            self._renders[cid] = (mods, q, a)
+            renders[cid] = (q, a)
+        return renders
+
+    def _buildRow(
+        self,
+        d: Sequence,
+        renders: Dict[int, Tuple[str, str]],
+        aggregates: Optional[Sequence] = None,
+    ) -> BrowserRow:
+        (
+            cid,
+            did,
+            odid,
+            ord,
+            cmod,
+            ctype,
+            queue,
+            due,
+            ivl,
+            factor,
+            reps,
+            lapses,
+            flags,
+            nid,
+            mid,
+            nmod,
+            tags,
+            flds,
+        ) = d
+        model = self.col.models.get(mid)
+        if model["type"] == MODEL_STD:
+            template = model["tmpls"][ord]
+        else:
+            template = model["tmpls"][0]
+        tagList = self.col.tags.split(tags)
+        sortIdx = self.col.models.sortIdx(model)
+
+        cells: List[Optional[str]] = []
+        for type in self.activeCols:
+            if aggregates:
+                t = self._noteCell(type, aggregates)
+                if t is not None:
+                    cells.append(t)
+                    continue
+            if type == "question":
+                t = renders[cid][0]
+            elif type == "answer":
+                q, a = renders[cid]
+                if not template.get("bafmt") and a.startswith(q):
+                    # need to strip question from answer
+                    a = a[len(q) :].strip()
+                t = a
+            elif type == "noteFld":
+                t = htmlToTextLine(splitFields(flds)[sortIdx])
+            elif type == "template":
+                t = template["name"]
+                if model["type"] == MODEL_CLOZE:
+                    t = f"{t} {ord + 1}"
+            elif type == "cardDue":
+                # catch invalid dates
+                try:
+                    t = self._dueText(odid, queue, ctype, due)
+                except:
+                    t = ""
+                if queue < 0:
+                    t = f"({t})"
+            elif type == "noteCrt":
+                t = time.strftime(self.time_format(), time.localtime(nid / 1000))
+            elif type == "noteMod":
+                t = time.strftime(self.time_format(), time.localtime(nmod))
+            elif type == "cardMod":
+                t = time.strftime(self.time_format(), time.localtime(cmod))
+            elif type == "cardReps":
+                t = str(reps)
+            elif type == "cardLapses":
+                t = str(lapses)
+            elif type == "noteTags":
+                t = " ".join(tagList)
+            elif type == "note":
+                t = model["name"]
+            elif type == "cardIvl":
+                if ctype == CARD_TYPE_NEW:
+                    t = _("(new)")
+                elif ctype == CARD_TYPE_LRN:
+                    t = _("(learning)")
+                else:
+                    t = self.col.format_timespan(ivl * 86400)
+            elif type == "cardEase":
+                if ctype == CARD_TYPE_NEW:
+                    t = _("(new)")
+                else:
+                    t = "%d%%" % (factor / 10)
+            elif type == "deck":
+                if odid:
+                    # in a cram deck
+                    t = "%s (%s)" % (
+                        self.col.decks.name(did),
+                        self.col.decks.name(odid),
+                    )
+                else:
+                    # normal deck
+                    t = self.col.decks.name(did)
+            else:
+                t = None
+            cells.append(t)
+
+        if aggregates:
+            # a note is only shown as suspended if all of its cards are
+            suspended = aggregates[8] == aggregates[0]
+        else:
+            suspended = queue == QUEUE_TYPE_SUSPENDED
+
+        return BrowserRow(
+            cells=cells,
+            flag=flags & 0b111,
+            marked=self.col.tags.inList("Marked", tagList),
+            suspended=suspended,
+            rtl=model["flds"][sortIdx]["rtl"],
+            template=template,
+        )
+
+    def _noteCell(self, type: str, aggregates: Sequence) -> Optional[str]:
+        """The text of a card column in notes mode, covering all of the note's
+        cards. None if the column should show the note's first card."""
+        (
+            count,
+            reps,
+            lapses,
+            mod,
+            factor,
+            ivl,
+            due,
+            deckCount,
+            suspendedCount,
+        ) = aggregates
+        if type == "template":
+            return ngettext("%d card", "%d cards", count) % count
         elif type == "cardDue":
-            # catch invalid dates
-            try:
-                t = self.nextDue(c, index)
-            except:
-                t = ""
-            if c.queue < 0:
-                t = f"({t})"
-            return t
-        elif type == "noteCrt":
-            return time.strftime(self.time_format(), time.localtime(c.note().id / 1000))
-        elif type == "noteMod":
-            return time.strftime(self.time_format(), time.localtime(c.note().mod))
+            # earliest review
+            if due is None:
+                return None
+            return self._dueText(0, QUEUE_TYPE_REV, CARD_TYPE_REV, due)
         elif type == "cardMod":
-            return time.strftime(self.time_format(), time.localtime(c.mod))
+            return time.strftime(self.time_format(), time.localtime(mod))
         elif type == "cardReps":
-            return str(c.reps)
+            return str(reps)
         elif type == "cardLapses":
-            return str(c.lapses)
-        elif type == "noteTags":
-            return " ".join(c.note().tags)
-        elif type == "note":
-            return c.model()["name"]
+            return str(lapses)
         elif type == "cardIvl":
-            if c.type == CARD_TYPE_NEW:
-                return _("(new)")
-            elif c.type == CARD_TYPE_LRN:
-                return _("(learning)")
-            return self.col.format_timespan(c.ivl * 86400)
+            # average over review cards
+            if ivl is None:
+                return None
+            return self.col.format_timespan(ivl * 86400)
         elif type == "cardEase":
-            if c.type == CARD_TYPE_NEW:
-                return _("(new)")
-            return "%d%%" % (c.factor / 10)
+            # average over cards that have been studied
+            if factor is None:
+                return None
+            return "%d%%" % (factor / 10)
         elif type == "deck":
-            if c.odid:
-                # in a cram deck
-                return "%s (%s)" % (
-                    self.browser.mw.col.decks.name(c.did),
-                    self.browser.mw.col.decks.name(c.odid),
-                )
-            # normal deck
-            return self.browser.mw.col.decks.name(c.did)
-
-    def question(self, c):
-        return htmlToTextLine(c.q(browser=True))
-
-    def answer(self, c):
-        if c.template().get("bafmt"):
-            # they have provided a template, use it verbatim
-            c.q(browser=True)
-            return htmlToTextLine(c.a())
-        # need to strip question from answer
-        q = self.question(c)
-        a = htmlToTextLine(c.a())
-        if a.startswith(q):
-            return a[len(q) :].strip()
-        return a
+            if deckCount > 1:
+                return _("(multiple)")
+            return None
+        return None
 
     def nextDue(self, c, index):
-        if c.odid:
+        return self._dueText(c.odid, c.queue, c.type, c.due)
+
+    def _dueText(self, odid: int, queue: int, type: int, due: int) -> str:
+        if odid:
             return _("(filtered)")
-        elif c.queue == QUEUE_TYPE_LRN:
-            date = c.due
-        elif c.queue == QUEUE_TYPE_NEW or c.type == CARD_TYPE_NEW:
-            return tr(TR.STATISTICS_DUE_FOR_NEW_CARD, number=c.due)
-        elif c.queue in (QUEUE_TYPE_REV, QUEUE_TYPE_DAY_LEARN_RELEARN) or (
-            c.type == CARD_TYPE_REV and c.queue < 0
+        elif queue == QUEUE_TYPE_LRN:
+            date = due
+        elif queue == QUEUE_TYPE_NEW or type == CARD_TYPE_NEW:
+            return tr(TR.STATISTICS_DUE_FOR_NEW_CARD, number=due)
+        elif queue in (QUEUE_TYPE_REV, QUEUE_TYPE_DAY_LEARN_RELEARN) or (
+            type == CARD_TYPE_REV and queue < 0
         ):
-            date = time.time() + ((c.due - self.col.sched.today) * 86400)
+            date = time.time() + ((due - self.col.sched.today) * 86400)
         else:
             return ""
         return time.strftime(self.time_format(), time.localtime(date))
@@ -385,10 +664,8 @@ class DataModel(QAbstractTableModel):
         if type != "noteFld":
             return False
 
-        row = index.row()
-        c = self.getCard(index)
-        nt = c.note().model()
-        return nt["flds"][self.col.models.sortIdx(nt)]["rtl"]
+        row = self.getRow(index)
+        return bool(row and row.rtl)
 
 
 # Line painter
@@ -403,21 +680,23 @@ class StatusDelegate(QItemDelegate):
 
     def paint(self, painter, option, index):
         try:
-            c = self.model.getCard(index)
+            row = self.model.getRow(index)
         except:
             # in the the middle of a reset; return nothing so this row is not
             # rendered until we have a chance to reset the model
             return
+        if not row:
+            return
 
         if self.model.isRTL(index):
             option.direction = Qt.RightToLeft
 
         col = None
-        if c.userFlag() > 0:
-            col = theme_manager.qcolor(f"flag{c.userFlag()}-bg")
-        elif c.note().hasTag("Marked"):
+        if row.flag > 0:
+            col = theme_manager.qcolor(f"flag{row.flag}-bg")
+        elif row.marked:
             col = theme_manager.qcolor("marked-bg")
-        elif c.queue == QUEUE_TYPE_SUSPENDED:
+        elif row.suspended:
             col = theme_manager.qcolor("suspended-bg")
         if col:
             brush = QBrush(col)
@@ -462,11 +741,33 @@ class SidebarItem:
         self.children: List["SidebarItem"] = []
         self.parentItem: Optional["SidebarItem"] = None
         self.tooltip: Optional[str] = None
+        # children that have not been created yet
+        self._pendingChildren: Optional[Iterator["SidebarItem"]] = None
 
     def addChild(self, cb: "SidebarItem") -> None:
         self.children.append(cb)
         cb.parentItem = self
 
+    def addChildrenLazily(self, children: Iterable["SidebarItem"]) -> None:
+        """Add children that are only created when the sidebar needs to show
+        them, after any existing children."""
+        if self._pendingChildren:
+            self._pendingChildren = itertools.chain(self._pendingChildren, children)
+        else:
+            self._pendingChildren = iter(children)
+
+    def hasPendingChildren(self) -> bool:
+        return self._pendingChildren is not None
+
+    def fetchPendingChildren(self, limit: int) -> List["SidebarItem"]:
+        "Create up to limit pending children. The caller must add them."
+        if not self._pendingChildren:
+            return []
+        children = list(itertools.islice(self._pendingChildren, limit))
+        if len(children) < limit:
+            self._pendingChildren = None
+        return children
+
     def rowForChild(self, child: "SidebarItem") -> Optional[int]:
         try:
             return self.children.index(child)
@@ -475,6 +776,9 @@ class SidebarItem:
 
 
 class SidebarModel(QAbstractItemModel):
+    # lazily added items are created this many at a time
+    fetchSize = 500
+
     def __init__(self, root: SidebarItem) -> None:
         super().__init__()
         self.root = root
@@ -489,6 +793,29 @@ class SidebarModel(QAbstractItemModel):
             item: SidebarItem = parent.internalPointer()
             return len(item.children)
 
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        item = self._itemForIndex(parent)
+        return bool(item.children) or item.hasPendingChildren()
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return self._itemForIndex(parent).hasPendingChildren()
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        item = self._itemForIndex(parent)
+        children = item.fetchPendingChildren(self.fetchSize)
+        if not children:
+            return
+        row = len(item.children)
+        self.beginInsertRows(parent, row, row + len(children) - 1)
+        for child in children:
+            item.addChild(child)
+        self.endInsertRows()
+
+    def _itemForIndex(self, index: QModelIndex) -> SidebarItem:
+        if not index.isValid():
+            return self.root
+        return index.internalPointer()
+
     def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
         return 1
 
@@ -630,6 +957,8 @@ class Browser(QMainWindow):
         qconnect(f.actionUndo.triggered, self.mw.onUndo)
         qconnect(f.actionInvertSelection.triggered, self.invertSelection)
         qconnect(f.actionSelectNotes.triggered, self.selectNotes)
+        f.actionNotesMode.setChecked(self.model.notesMode)
+        qconnect(f.actionNotesMode.toggled, self.toggleNotesMode)
         if not isMac:
             f.actionClose.setVisible(False)
         # notes
@@ -821,12 +1150,20 @@ class Browser(QMainWindow):
     def updateTitle(self):
         selected = len(self.form.tableView.selectionModel().selectedRows())
         cur = len(self.model.cards)
-        self.setWindowTitle(
-            ngettext(
+        if self.model.notesMode:
+            title = ngettext(
+                "Browse (%(cur)d note shown; %(sel)s)",
+                "Browse (%(cur)d notes shown; %(sel)s)",
+                cur,
+            )
+        else:
+            title = ngettext(
                 "Browse (%(cur)d card shown; %(sel)s)",
                 "Browse (%(cur)d cards shown; %(sel)s)",
                 cur,
             )
+        self.setWindowTitle(
+            title
             % {
                 "cur": cur,
                 "sel": ngettext("%d selected", "%d selected", selected) % selected,
@@ -936,16 +1273,10 @@ QTableView {{ gridline-color: {grid} }}
 
     def _onSortChanged(self, idx, ord):
         type = self.model.activeCols[idx]
-        noSort = ("question", "answer")
-        if type in noSort:
-            showInfo(
-                _("Sorting on this column is not supported. Please " "choose another.")
-            )
-            type = self.col.conf["sortType"]
         if self.col.conf["sortType"] != type:
             self.col.conf["sortType"] = type
             # default to descending for non-text fields
-            if type == "noteFld":
+            if type in ("noteFld", "question", "answer"):
                 ord = not ord
             self.col.conf["sortBackwards"] = ord
             self.col.setMod()
@@ -1034,6 +1365,7 @@ QTableView {{ gridline-color: {grid} }}
         dw.setAllowedAreas(Qt.LeftDockWidgetArea)
 
         self.sidebarTree: SidebarTreeViewBase
+        self._sidebarShownState: Optional[Tuple] = None
         if self.want_old_sidebar:
             self.sidebarTree = self.SidebarTreeView()
         else:
@@ -1068,6 +1400,12 @@ QTableView {{ gridline-color: {grid} }}
         if self.sidebarDockWidget.isVisible():
             # add slight delay to allow browser window to appear first
             def deferredDisplay():
+                # keep the current tree, along with its scroll position and
+                # expanded items, unless something it shows has changed
+                state = self._sidebarState()
+                if self.sidebarTree.model() and state == self._sidebarShownState:
+                    return
+                self._sidebarShownState = state
                 root = self.buildTree()
                 model = SidebarModel(root)
                 self.sidebarTree.setModel(model)
@@ -1075,6 +1413,15 @@ QTableView {{ gridline-color: {grid} }}
 
             self.mw.progress.timer(10, deferredDisplay, False)
 
+    def _sidebarState(self) -> Tuple:
+        "The collection data shown in the sidebar."
+        return (
+            self.col.get_config("savedFilters", {}),
+            [(d.id, d.name) for d in self.col.decks.all_names_and_ids()],
+            [(m.id, m.name) for m in self.col.models.all_names_and_ids()],
+            self.col.tags.all(),
+        )
+
     def buildTree(self) -> SidebarItem:
         root = SidebarItem("", "", item_type=SidebarItemType.ROOT)
 
@@ -1130,43 +1477,46 @@ QTableView {{ gridline-color: {grid} }}
 
     def _userTagTree(self, root) -> None:
         assert self.col
-        for t in self.col.tags.all():
-            item = SidebarItem(
+
+        def tagItem(t: str) -> SidebarItem:
+            return SidebarItem(
                 t,
                 ":/icons/tag.svg",
-                lambda t=t: self.setFilter("tag", t),  # type: ignore
+                lambda: self.setFilter("tag", t),
                 item_type=SidebarItemType.TAG,
             )
-            root.addChild(item)
+
+        # tags are created as they are scrolled into view
+        root.addChildrenLazily(tagItem(t) for t in self.col.tags.all())
 
     def _decksTree(self, root) -> None:
         tree = self.col.decks.deck_tree()
 
-        def fillGroups(root, nodes: Sequence[DeckTreeNode], head=""):
-            for node in nodes:
-
-                def set_filter():
-                    full_name = head + node.name  # pylint: disable=cell-var-from-loop
-                    return lambda: self.setFilter("deck", full_name)
-
-                def toggle_expand():
-                    did = node.deck_id  # pylint: disable=cell-var-from-loop
-                    return lambda _: self.mw.col.decks.collapseBrowser(did)
-
-                item = SidebarItem(
-                    node.name,
-                    ":/icons/deck.svg",
-                    set_filter(),
-                    toggle_expand(),
-                    not node.collapsed,
-                    item_type=SidebarItemType.DECK,
-                    id=node.deck_id,
+        def deckItem(node: DeckTreeNode, head: str) -> SidebarItem:
+            full_name = head + node.name
+            did = node.deck_id
+            item = SidebarItem(
+                node.name,
+                ":/icons/deck.svg",
+                lambda: self.setFilter("deck", full_name),
+                lambda _: self.mw.col.decks.collapseBrowser(did),
+                not node.collapsed,
+                item_type=SidebarItemType.DECK,
+                id=did,
+            )
+            newhead = full_name + "::"
+            if node.collapsed and node.children:
+                # the children of collapsed decks are created when expanded
+                item.addChildrenLazily(
+                    deckItem(child, newhead) for child in node.children
                 )
-                root.addChild(item)
-                newhead = head + node.name + "::"
-                fillGroups(item, node.children, newhead)
+            else:
+                for child in node.children:
+                    item.addChild(deckItem(child, newhead))
+            return item
 
-        fillGroups(root, tree.children)
+        for node in tree.children:
+            root.addChild(deckItem(node, ""))
 
     def _modelTree(self, root) -> None:
         assert self.col
@@ -1451,12 +1801,20 @@ QTableView {{ gridline-color: {grid} }}
     ######################################################################
 
     def selectedCards(self):
+        if self.model.notesMode:
+            # actions apply to all cards of the selected notes
+            return self.selectedNotesAsCards()
         return [
             self.model.cards[idx.row()]
             for idx in self.form.tableView.selectionModel().selectedRows()
         ]
 
     def selectedNotes(self):
+        if self.model.notesMode:
+            return [
+                self.model.noteIds[idx.row()]
+                for idx in self.form.tableView.selectionModel().selectedRows()
+            ]
         return self.col.db.list(
             """
 select distinct nid from cards
@@ -1563,6 +1921,7 @@ where id in %s"""
             newRow = min(newRow, len(self.model.cards) - 1)
             newRow = max(newRow, 0)
             self.model.focusedCard = self.model.cards[newRow]
+            self.model.focusedRow = newRow
         self.model.endReset()
         self.mw.reset()
         tooltip(
@@ -1804,6 +2163,17 @@ where id in %s"""
         self.form.tableView.selectAll()
         sm.select(items, QItemSelectionModel.Deselect | QItemSelectionModel.Rows)
 
+    # Edit: notes mode
+    ######################################################################
+
+    def toggleNotesMode(self, on: bool) -> None:
+        self.editor.saveNow(lambda: self._toggleNotesMode(on))
+
+    def _toggleNotesMode(self, on: bool) -> None:
+        self.model.notesMode = on
+        self.col.set_config("browserNotesMode", on)
+        self.search()
+
     # Hooks
     ######################################################################
 
@@ -2084,7 +2454,11 @@ where id in %s"""
 
     def focusCid(self, cid):
         try:
-            row = self.model.cards.index(cid)
+            if self.model.notesMode:
+                nid = self.col.db.scalar("select nid from cards where id = ?", cid)
+                row = self.model.noteIds.index(nid)
+            else:
+                row = self.model.cards.index(cid)
         except:
             return
         self.form.tableView.selectRow(row)
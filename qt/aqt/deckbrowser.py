@@ -4,8 +4,10 @@
 
 from __future__ import annotations
 
+import json
 from copy import deepcopy
 from dataclasses import dataclass
+from typing import List, Optional, Tuple
 
 import aqt
 from anki.errors import DeckRenameError
@@ -15,6 +17,7 @@ from anki.utils import ids2str
 from aqt import AnkiQt, gui_hooks
 from aqt.qt import *
 from aqt.sound import av_player
+from aqt.theme import theme_manager
 from aqt.toolbar import BottomBar
 from aqt.utils import askUser, getOnlyText, openLink, shortcut, showWarning, tr
 
@@ -43,6 +46,14 @@ class RenderDeckNodeContext:
     current_deck_id: int
 
 
+@dataclass
+class _ShownPage:
+    "What the deck browser page currently in the webview was built from."
+    rows: List[Tuple[int, str]]
+    stats: str
+    night_mode: bool
+
+
 class DeckBrowser:
     _dueTree: DeckTreeNode
 
@@ -51,6 +62,8 @@ class DeckBrowser:
         self.web = mw.web
         self.bottom = BottomBar(mw, mw.bottomWeb)
         self.scrollPos = QPoint(0, 0)
+        # set while our page is in the webview, so it can be updated in place
+        self._shown: Optional[_ShownPage] = None
 
     def show(self):
         av_player.stop_and_clear_queue()
@@ -62,6 +75,10 @@ class DeckBrowser:
     def refresh(self):
         self._renderPage()
 
+    def cleanup(self) -> None:
+        "Called when another screen replaces the deck list."
+        self._shown = None
+
     # Event handlers
     ##########################################################################
 
@@ -100,12 +117,12 @@ class DeckBrowser:
 
     _body = """
 <center>
-<table cellspacing=0 cellpading=3>
+<table id=decktree cellspacing=0 cellpading=3>
 %(tree)s
 </table>
 
 <br>
-%(stats)s
+<div id=studiedToday>%(stats)s</div>
 </center>
 """
 
@@ -117,11 +134,15 @@ class DeckBrowser:
         self.web.evalWithCallback("window.pageYOffset", self.__renderPage)
 
     def __renderPage(self, offset):
-        content = DeckBrowserContent(
-            tree=self._renderDeckTree(self._dueTree),
-            stats=self._renderStats(),
-        )
+        rows = self._renderDeckRows(self._dueTree)
+        tree = self._renderDeckTreeHeader() + "".join(html for did, html in rows)
+        content = DeckBrowserContent(tree=tree, stats=self._renderStats())
         gui_hooks.deck_browser_will_render_content(self, content)
+        # if an add-on has altered the tree, we can't tell which rows changed
+        if content.tree == tree and self._updatePage(rows, content):
+            gui_hooks.deck_browser_did_render(self)
+            return
+
         self.web.stdHtml(
             self._body % content.__dict__,
             css=["deckbrowser.css"],
@@ -132,8 +153,40 @@ class DeckBrowser:
         self._drawButtons()
         if offset is not None:
             self._scrollToOffset(offset)
+        if content.tree == tree:
+            self._shown = _ShownPage(
+                rows=rows, stats=content.stats, night_mode=theme_manager.night_mode
+            )
+        else:
+            self._shown = None
         gui_hooks.deck_browser_did_render(self)
 
+    def _updatePage(
+        self, rows: List[Tuple[int, str]], content: DeckBrowserContent
+    ) -> bool:
+        """Patch the page already in the webview to show the provided rows and
+        stats, sending only what changed. False if the page must be redrawn."""
+        shown = self._shown
+        if not shown or shown.night_mode != theme_manager.night_mode:
+            return False
+
+        if [did for did, html in rows] == [did for did, html in shown.rows]:
+            # same decks in the same order, so only changed rows are replaced
+            old = dict(shown.rows)
+            changed = [(did, html) for did, html in rows if old[did] != html]
+            if changed:
+                self.web.eval("updateDeckRows(%s);" % json.dumps(changed))
+        else:
+            # decks were added, removed or expanded
+            self.web.eval("updateDeckTree(%s);" % json.dumps(content.tree))
+        if content.stats != shown.stats:
+            self.web.eval("updateStats(%s);" % json.dumps(content.stats))
+
+        self._shown = _ShownPage(
+            rows=rows, stats=content.stats, night_mode=shown.night_mode
+        )
+        return True
+
     def _scrollToOffset(self, offset):
         self.web.eval("$(function() { window.scrollTo(0, %d, 'instant'); });" % offset)
 
@@ -141,6 +194,16 @@ class DeckBrowser:
         return self.mw.col.studied_today()
 
     def _renderDeckTree(self, top: DeckTreeNode) -> str:
+        buf = self._renderDeckTreeHeader()
+
+        ctx = RenderDeckNodeContext(current_deck_id=self.mw.col.conf["curDeck"])
+
+        for child in top.children:
+            buf += self._render_deck_node(child, ctx)
+
+        return buf
+
+    def _renderDeckTreeHeader(self) -> str:
         buf = """
 <tr><th colspan=5 align=start>%s</th><th class=count>%s</th>
 <th class=count>%s</th><th class=optscol></th></tr>""" % (
@@ -149,15 +212,32 @@ class DeckBrowser:
             _("New"),
         )
         buf += self._topLevelDragRow()
+        return buf
 
+    def _renderDeckRows(self, top: DeckTreeNode) -> List[Tuple[int, str]]:
+        "The id and HTML of each visible deck's row, in display order."
         ctx = RenderDeckNodeContext(current_deck_id=self.mw.col.conf["curDeck"])
+        rows: List[Tuple[int, str]] = []
+
+        def add(node: DeckTreeNode) -> None:
+            rows.append((node.deck_id, self._render_deck_row(node, ctx)))
+            if not node.collapsed:
+                for child in node.children:
+                    add(child)
 
         for child in top.children:
-            buf += self._render_deck_node(child, ctx)
+            add(child)
+        return rows
 
+    def _render_deck_node(self, node: DeckTreeNode, ctx: RenderDeckNodeContext) -> str:
+        buf = self._render_deck_row(node, ctx)
+        # children
+        if not node.collapsed:
+            for child in node.children:
+                buf += self._render_deck_node(child, ctx)
         return buf
 
-    def _render_deck_node(self, node: DeckTreeNode, ctx: RenderDeckNodeContext) -> str:
+    def _render_deck_row(self, node: DeckTreeNode, ctx: RenderDeckNodeContext) -> str:
         if node.collapsed:
             prefix = "+"
         else:
@@ -211,10 +291,6 @@ class DeckBrowser:
             "<td align=center class=opts><a onclick='return pycmd(\"opts:%d\");'>"
             "<img src='/_anki/imgs/gears.svg' class=gears></a></td></tr>" % node.deck_id
         )
-        # children
-        if not node.collapsed:
-            for child in node.children:
-                buf += self._render_deck_node(child, ctx)
         return buf
 
     def _topLevelDragRow(self):
@@ -188,6 +188,15 @@ you can enter it here. Use \\t to represent tab."""
         self.mw.progress.start()
         self.mw.checkpoint(_("Import"))
 
+        def on_progress(count: int) -> None:
+            self.mw.taskman.run_on_main(
+                lambda: self.mw.progress.update(
+                    ngettext("Processed %d note", "Processed %d notes", count) % count
+                )
+            )
+
+        self.importer.progressCallback = on_progress
+
         def on_done(future: Future):
             self.mw.progress.finish()
 
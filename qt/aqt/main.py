@@ -27,13 +27,14 @@ import aqt.stats
 import aqt.toolbar
 import aqt.webview
 from anki import hooks
+from anki.backups import BACKUP_EXT, PERIODIC_SUFFIX, BackupStore
 from anki.collection import Collection
 from anki.decks import Deck
 from anki.hooks import runHook
 from anki.lang import _, ngettext
 from anki.rsbackend import RustBackend
 from anki.sound import AVTag, SoundOrVideoTag
-from anki.utils import devMode, ids2str, intTime, isMac, isWin, splitFields
+from anki.utils import devMode, ids2str, intTime, isMac, isWin, namedtmp, splitFields
 from aqt import gui_hooks
 from aqt.addons import DownloadLogEntry, check_and_prompt_for_updates, show_log_to_user
 from aqt.dbcheck import check_db
@@ -221,6 +222,7 @@ class AnkiQt(QMainWindow):
 
         self.pendingImport: Optional[str] = None
         self.restoringBackup = False
+        self._backupThread: Optional[Thread] = None
         # profile not provided on command line?
         if not self.pm.name:
             # if there's a single profile, load it automatically
@@ -350,11 +352,15 @@ Replace your collection with an earlier backup?"""
             self.profileDiag,
             _("Revert to backup"),
             cb=doOpen,
-            filter="*.colpkg",
+            filter="*.colpkg *%s" % BACKUP_EXT,
             dir=self.pm.backupFolder(),
         )
 
     def _openBackup(self, path):
+        self.waitForBackup()
+        if path.endswith(BACKUP_EXT):
+            path = self._colpkgFromBackup(path)
+
         try:
             # move the existing collection to the trash, as it may not open
             self.pm.trashCollection()
@@ -379,6 +385,19 @@ close the profile or restart Anki."""
 
         self.onOpenProfile()
 
+    def _colpkgFromBackup(self, manifest: str) -> str:
+        "Reassemble an incremental backup into a package that can be imported."
+        path = namedtmp("backup.colpkg")
+        self.progress.start(immediate=True)
+        try:
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as z:
+                with z.open("collection.anki2", "w", force_zip64=True) as file:
+                    BackupStore(os.path.dirname(manifest)).restore(manifest, file)
+                z.writestr("media", "{}")
+        finally:
+            self.progress.finish()
+        return path
+
     def _on_downgrade(self):
         self.progress.start()
         profiles = self.pm.profiles()
@@ -493,6 +512,7 @@ close the profile or restart Anki."""
     ##########################################################################
 
     def loadCollection(self) -> bool:
+        self.waitForBackup()
         try:
             self._loadCollection()
         except Exception as e:
@@ -552,6 +572,7 @@ close the profile or restart Anki."""
     def _unloadCollection(self) -> None:
         if not self.col:
             return
+        self.waitForBackup()
         if self.restoringBackup:
             label = _("Closing...")
         else:
@@ -589,54 +610,81 @@ from the profile screen."
     ##########################################################################
 
     class BackupThread(Thread):
-        def __init__(self, path, data):
+        def __init__(
+            self,
+            colpath: str,
+            dir: str,
+            name: str,
+            nbacks: int,
+            col: Optional[Collection] = None,
+        ) -> None:
             Thread.__init__(self)
-            self.path = path
-            self.data = data
-            # create the file in calling thread to ensure the same
-            # file is not created twice
-            with open(self.path, "wb") as file:
-                pass
+            self.colpath = colpath
+            self.name = name
+            self.nbacks = nbacks
+            self.store = BackupStore(dir)
+            # if set, the open collection is first copied into colpath,
+            # which is removed once it has been added
+            self.col = col
 
         def run(self):
-            z = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED)
-            z.writestr("collection.anki2", self.data)
-            z.writestr("media", "{}")
-            z.close()
-
-    def backup(self) -> None:
+            try:
+                if self.col:
+                    self.col.backup_to(self.colpath)
+                self.store.add(self.colpath, self.name)
+            finally:
+                if self.col and os.path.exists(self.colpath):
+                    os.unlink(self.colpath)
+
+            # remove old ones; periodic backups have their own limit, so a
+            # long session doesn't push out the backups taken on close
+            self.store.prune(self.nbacks, AnkiQt.periodicBackups)
+
+    def backup(self, periodic: bool = False) -> None:
+        """Back up the collection file after it has been closed, or if
+        periodic is true, the last saved state of the open collection."""
         nbacks = self.pm.profile["numBackups"]
         if not nbacks or devMode:
             return
         dir = self.pm.backupFolder()
-        path = self.pm.collectionPath()
 
-        # do backup
-        fname = time.strftime(
-            "backup-%Y-%m-%d-%H.%M.%S.colpkg", time.localtime(time.time())
-        )
-        newpath = os.path.join(dir, fname)
-        with open(path, "rb") as f:
-            data = f.read()
-        self.BackupThread(newpath, data).start()
-
-        # find existing backups
-        backups = []
-        for file in os.listdir(dir):
-            # only look for new-style format
-            m = re.match(r"backup-\d{4}-\d{2}-.+.colpkg", file)
-            if not m:
-                continue
-            backups.append(file)
-        backups.sort()
-
-        # remove old ones
-        while len(backups) > nbacks:
-            fname = backups.pop(0)
-            path = os.path.join(dir, fname)
-            os.unlink(path)
+        # do backup; the file is read in the background, so we must wait for
+        # the backup to finish before the collection is closed or opened again
+        fname = time.strftime("backup-%Y-%m-%d-%H.%M.%S", time.localtime(time.time()))
+        if periodic:
+            fname += PERIODIC_SUFFIX
+            self._backupThread = self.BackupThread(
+                namedtmp("snapshot.anki2"), dir, fname, nbacks, col=self.col
+            )
+        else:
+            self._backupThread = self.BackupThread(
+                self.pm.collectionPath(), dir, fname, nbacks
+            )
+        self._backupThread.start()
         gui_hooks.backup_did_complete()
 
+    # number of backups taken while the collection is open that are kept
+    periodicBackups = 4
+
+    def onBackupTimer(self) -> None:
+        # the collection may be closed for a full sync, or in use by a sync
+        # or check database, which show a progress window
+        if not self.col or not self.col.db or self.progress.busy():
+            return
+        if self.restoringBackup or not self.pm.profile["numBackups"] or devMode:
+            return
+        if self._backupThread and self._backupThread.is_alive():
+            return
+        # the backup only includes committed changes; the copy itself is
+        # made in the background on a separate connection
+        self.col.save()
+        self.backup(periodic=True)
+
+    def waitForBackup(self) -> None:
+        if self._backupThread:
+            self._backupThread.join()
+            self._backupThread = None
+
     def maybeOptimize(self) -> None:
         # have two weeks passed?
         if (intTime() - self.pm.profile["lastOptimize"]) < 86400 * 14:
@@ -669,6 +717,10 @@ from the profile screen."
         self.maybe_check_for_addon_updates()
         self.deckBrowser.show()
 
+    def _deckBrowserCleanup(self, newState: str) -> None:
+        if newState != "deckBrowser":
+            self.deckBrowser.cleanup()
+
     def _selectedDeck(self) -> Optional[Deck]:
         did = self.col.decks.selected()
         if not self.col.decks.nameOrNone(did):
@@ -1251,6 +1303,8 @@ Difference to correct time: %s."""
         self.progress.timer(10 * 60 * 1000, self.onRefreshTimer, True)
         # check media sync every 5 minutes
         self.progress.timer(5 * 60 * 1000, self.on_autosync_timer, True)
+        # back up the open collection every 30 minutes
+        self.progress.timer(30 * 60 * 1000, self.onBackupTimer, True)
         # ensure Python interpreter runs at least once per second, so that
         # SIGINT/SIGTERM is processed without a long delay
         self.progress.timer(1000, lambda: None, True, False)
@@ -4,19 +4,22 @@
 
 from __future__ import annotations
 
-import logging
+import asyncio
+import functools
+import mimetypes
 import os
 import re
+import stat
 import sys
 import threading
 import time
 import traceback
+import urllib.parse
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import sha1
 from http import HTTPStatus
-
-import flask
-import flask_cors  # type: ignore
-from flask import Response, request
-from waitress.server import create_server
+from typing import BinaryIO, Callable, Dict, Iterable, Optional, Tuple
 
 import aqt
 from anki.rsbackend import from_json_bytes
@@ -38,11 +41,84 @@ def _getExportFolder():
 
 
 _exportFolder = _getExportFolder()
-app = flask.Flask(__name__)
-flask_cors.CORS(app)
+
+
+@dataclass
+class CachedFile:
+    data: bytes
+    # hex digest of the data
+    etag: str
+    # the file's size and mtime when it was read
+    size: int
+    mtime_ns: int
+
+
+class FileCache:
+    """Keeps recently served small files in memory. Entries are keyed on
+    path, and are only used while the file's size and mtime are unchanged.
+    Shared by the server's threads."""
+
+    # larger files are always sent from disk
+    max_file_size = 1024 * 1024
+    max_total_size = 32 * 1024 * 1024
+
+    def __init__(self) -> None:
+        self._files: OrderedDict[str, CachedFile] = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, path: str, st: os.stat_result) -> Optional[CachedFile]:
+        "The cached contents of the file at path, if up to date."
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and entry.size == st.st_size and entry.mtime_ns == st.st_mtime_ns:
+                self._files.move_to_end(path)
+                return entry
+        return None
+
+    def get(self, path: str, st: os.stat_result) -> Optional[CachedFile]:
+        """The contents of the file at path, which st describes, reading it
+        if necessary. None if the file is too large to cache."""
+        if st.st_size > self.max_file_size:
+            return None
+        entry = self.lookup(path, st)
+        if entry:
+            return entry
+
+        with open(path, "rb") as file:
+            data = file.read()
+        entry = CachedFile(
+            data=data,
+            etag=sha1(data).hexdigest(),
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+        )
+
+        with self._lock:
+            old = self._files.pop(path, None)
+            if old:
+                self._total_size -= len(old.data)
+            self._files[path] = entry
+            self._total_size += len(data)
+            while self._total_size > self.max_total_size:
+                # drop the least recently used files
+                _, dropped = self._files.popitem(last=False)
+                self._total_size -= len(dropped.data)
+        return entry
+
+
+_file_cache = FileCache()
+
+
+@functools.lru_cache(maxsize=32)
+def _realpath(directory: str) -> str:
+    return os.path.realpath(directory)
 
 
 class MediaServer(threading.Thread):
+    """Serves media, bundled web files and add-on web exports to the
+    webviews. Connections are handled by an asyncio event loop on this
+    thread; work that may block for long is passed to a thread pool."""
 
     _ready = threading.Event()
     daemon = True
@@ -50,98 +126,244 @@ class MediaServer(threading.Thread):
     def __init__(self, mw: aqt.main.AnkiQt, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.is_shutdown = False
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.port = 0
 
     def run(self):
+        self.loop = loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         try:
-            if devMode:
-                # idempotent if logging has already been set up
-                logging.basicConfig()
-            logging.getLogger("waitress").setLevel(logging.ERROR)
-
             desired_port = int(os.getenv("ANKI_API_PORT", "0"))
-            self.server = create_server(app, host="127.0.0.1", port=desired_port)
-            if devMode:
-                print(
-                    "Serving on http://%s:%s"
-                    % (self.server.effective_host, self.server.effective_port)  # type: ignore
+            server = loop.run_until_complete(
+                asyncio.start_server(
+                    _handle_connection, host="127.0.0.1", port=desired_port
                 )
+            )
+            self.port = server.sockets[0].getsockname()[1]
+            if devMode:
+                print("Serving on http://127.0.0.1:%s" % self.port)
 
             self._ready.set()
-            self.server.run()
+            loop.run_forever()
 
+            server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
         except Exception:
             if not self.is_shutdown:
                 raise
+        finally:
+            loop.close()
 
     def shutdown(self):
         self.is_shutdown = True
-        sockets = list(self.server._map.values())  # type: ignore
-        for socket in sockets:
-            socket.handle_close()
-        # https://github.com/Pylons/webtest/blob/4b8a3ebf984185ff4fefb31b4d0cf82682e1fcf7/webtest/http.py#L93-L104
-        self.server.task_dispatcher.shutdown()
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
 
     def getPort(self):
         self._ready.wait()
-        return int(self.server.effective_port)  # type: ignore
+        return self.port
+
+
+# HTTP
+##########################################################################
+
 
+@dataclass
+class Request:
+    method: str
+    # decoded, without the leading slash or query string
+    path: str
+    # names are lowercase
+    headers: Dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+
+@dataclass
+class Response:
+    status: HTTPStatus
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    # if set, the body is sent from the file with sendfile(), and the
+    # file is closed afterwards
+    file: Optional[BinaryIO] = None
+    offset: int = 0
+    count: int = 0
+
+
+def _text_response(status: HTTPStatus, text: str) -> Response:
+    return Response(
+        status,
+        headers={"Content-Type": "text/plain; charset=utf-8"},
+        body=text.encode("utf8"),
+    )
+
+
+async def _handle_connection(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            request = await _read_request(reader)
+            if request is None:
+                break
+            response = await _handle_request(request)
+            await _write_response(writer, request, response)
+            if not request.keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        # client went away, or sent something we can't parse
+        pass
+    finally:
+        writer.close()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    "The next request on the connection, or None if it has been closed."
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, version = line.decode("latin-1").split()
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", "0"))
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.1":
+        keep_alive = connection != "close"
+    else:
+        keep_alive = connection == "keep-alive"
+    if "transfer-encoding" in headers:
+        # chunked request bodies are not supported, so we can't tell
+        # where the next request starts
+        keep_alive = False
+
+    path = urllib.parse.unquote(target.split("?", 1)[0]).lstrip("/")
+    return Request(
+        method=method, path=path, headers=headers, body=body, keep_alive=keep_alive
+    )
+
+
+async def _write_response(
+    writer: asyncio.StreamWriter, request: Request, response: Response
+) -> None:
+    try:
+        headers = response.headers
+        headers["Access-Control-Allow-Origin"] = "*"
+        if response.file:
+            headers["Content-Length"] = str(response.count)
+        else:
+            headers["Content-Length"] = str(len(response.body))
+        headers["Connection"] = "keep-alive" if request.keep_alive else "close"
+
+        head = "HTTP/1.1 %d %s\r\n" % (response.status, response.status.phrase)
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n")
+
+        if request.method != "HEAD":
+            if response.file:
+                await writer.drain()
+                # falls back on reading and writing if sendfile is unavailable
+                await asyncio.get_running_loop().sendfile(
+                    writer.transport, response.file, response.offset, response.count
+                )
+            else:
+                writer.write(response.body)
+        await writer.drain()
+    finally:
+        if response.file:
+            response.file.close()
+
+
+# Requests
+##########################################################################
+
+
+async def _handle_request(request: Request) -> Response:
+    if request.method == "OPTIONS":
+        # CORS preflight
+        return Response(
+            HTTPStatus.NO_CONTENT,
+            headers={
+                "Access-Control-Allow-Methods": "GET, HEAD, POST",
+                "Access-Control-Allow-Headers": request.headers.get(
+                    "access-control-request-headers", "*"
+                ),
+            },
+        )
+    if request.method not in ("GET", "HEAD", "POST"):
+        return _text_response(
+            HTTPStatus.METHOD_NOT_ALLOWED, f"Unsupported method: {request.method}"
+        )
+
+    pathin = request.path
+    if not pathin:
+        return _text_response(HTTPStatus.NOT_FOUND, "Not found")
 
-@app.route("/<path:pathin>", methods=["GET", "POST"])
-def allroutes(pathin):
     try:
         directory, path = _redirectWebExports(pathin)
     except TypeError:
-        return flask.make_response(
-            f"Invalid path: {pathin}",
-            HTTPStatus.FORBIDDEN,
-        )
+        return _text_response(HTTPStatus.FORBIDDEN, f"Invalid path: {pathin}")
+
+    directory = _realpath(directory)
+    path = os.path.normpath(path)
+    fullpath = os.path.abspath(os.path.join(directory, path))
 
     try:
-        isdir = os.path.isdir(os.path.join(directory, path))
+        st: Optional[os.stat_result] = os.stat(fullpath)
     except ValueError:
-        return flask.make_response(
-            "Path for '%s - %s' is too long!" % (directory, path),
+        return _text_response(
             HTTPStatus.BAD_REQUEST,
+            "Path for '%s - %s' is too long!" % (directory, path),
         )
-
-    directory = os.path.realpath(directory)
-    path = os.path.normpath(path)
-    fullpath = os.path.abspath(os.path.join(directory, path))
+    except OSError:
+        st = None
+    isdir = st is not None and stat.S_ISDIR(st.st_mode)
 
     # protect against directory transversal: https://security.openstack.org/guidelines/dg_using-file-paths.html
     if not fullpath.startswith(directory):
-        return flask.make_response(
-            "Path for '%s - %s' is a security leak!" % (directory, path),
+        return _text_response(
             HTTPStatus.FORBIDDEN,
+            "Path for '%s - %s' is a security leak!" % (directory, path),
         )
 
     if isdir:
-        return flask.make_response(
-            "Path for '%s - %s' is a directory (not supported)!" % (directory, path),
+        return _text_response(
             HTTPStatus.FORBIDDEN,
+            "Path for '%s - %s' is a directory (not supported)!" % (directory, path),
         )
 
     if devMode:
-        print(f"{time.time():.3f} {flask.request.method} /{pathin}")
+        print(f"{time.time():.3f} {request.method} /{pathin}")
 
     try:
-        if flask.request.method == "POST":
-            return handle_post(path)
+        if request.method == "POST":
+            # handlers use the collection, so keep them off the event loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None, handle_post, path, request.body
+            )
 
-        if fullpath.endswith(".css"):
-            # some users may have invalid mime type in the Windows registry
-            mimetype = "text/css"
-        else:
-            # autodetect
-            mimetype = None
-        if os.path.exists(fullpath):
-            return flask.send_file(fullpath, mimetype=mimetype, conditional=True)
-        else:
+        if st is None:
             print(f"Not found: {ascii(pathin)}")
-            return flask.make_response(
-                f"Invalid path: {pathin}",
-                HTTPStatus.NOT_FOUND,
-            )
+            return _text_response(HTTPStatus.NOT_FOUND, f"Invalid path: {pathin}")
+
+        response = await _file_response(request, fullpath, st)
+        # media may be edited, and bundled files change on upgrade while
+        # the URL can stay the same when ANKI_API_PORT is set, so have the
+        # webview revalidate with the ETag each time
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     except Exception as error:
         if devMode:
@@ -153,10 +375,128 @@ def allroutes(pathin):
         # swallow it - user likely surfed away from
         # review screen before an image had finished
         # downloading
-        return flask.make_response(
-            str(error),
-            HTTPStatus.INTERNAL_SERVER_ERROR,
+        return _text_response(HTTPStatus.INTERNAL_SERVER_ERROR, str(error))
+
+
+async def _file_response(
+    request: Request, fullpath: str, st: os.stat_result
+) -> Response:
+    entry = _file_cache.lookup(fullpath, st)
+    if entry is None and st.st_size <= _file_cache.max_file_size:
+        entry = await asyncio.get_running_loop().run_in_executor(
+            None, _file_cache.get, fullpath, st
         )
+    if entry:
+        etag = '"%s"' % entry.etag
+    else:
+        etag = '"%x-%x"' % (st.st_mtime_ns, st.st_size)
+
+    headers = {
+        "Content-Type": _content_type(fullpath),
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    size = st.st_size
+    start, end = 0, size - 1
+    status = HTTPStatus.OK
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = _byte_range(range_header, size)
+        except _RangeNotSatisfiable:
+            headers["Content-Range"] = "bytes */%d" % size
+            return Response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+        if byte_range:
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+            headers["Content-Range"] = "bytes %d-%d/%d" % (start, end, size)
+
+    if entry:
+        return Response(status, headers=headers, body=entry.data[start : end + 1])
+    return Response(
+        status,
+        headers=headers,
+        file=open(fullpath, "rb"),
+        offset=start,
+        count=end + 1 - start,
+    )
+
+
+def _content_type(path: str) -> str:
+    if path.endswith(".css"):
+        # some users may have invalid mime type in the Windows registry
+        return "text/css; charset=utf-8"
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if mimetype.startswith("text/") or mimetype == "application/javascript":
+        mimetype += "; charset=utf-8"
+    return mimetype
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+def _byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """The first and last byte of the range in a Range header. None if the
+    header is invalid or asks for multiple ranges, in which case the whole
+    file should be sent."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            # the last n bytes
+            suffix = int(last)
+            if suffix <= 0 or not size:
+                raise _RangeNotSatisfiable
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        raise _RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+# how much of a file too large to cache is read by preload_files()
+_preload_size = 2 * 1024 * 1024
+
+
+def preload_files(directory: str, filenames: Iterable[str]) -> None:
+    """Read the provided files in directory ahead of their being requested.
+    Small files are added to the server's cache, and only the start of
+    larger ones is read, so that playback can begin from the OS page cache.
+    Missing files are skipped. Call on a background thread."""
+    # paths are resolved as requests are, so they match the cache's keys
+    directory = _realpath(directory)
+    for filename in filenames:
+        path = os.path.abspath(os.path.join(directory, os.path.normpath(filename)))
+        if not path.startswith(directory):
+            continue
+        try:
+            if _file_cache.get(path, os.stat(path)):
+                continue
+            with open(path, "rb") as file:
+                file.read(_preload_size)
+        except (OSError, ValueError):
+            pass
 
 
 def _redirectWebExports(path):
@@ -201,8 +541,16 @@ def _redirectWebExports(path):
     return aqt.mw.col.media.dir(), path
 
 
+_post_request = threading.local()
+
+
+def request_body() -> bytes:
+    "The body of the POST request being handled, for use by post_handlers."
+    return _post_request.body
+
+
 def graph_data() -> bytes:
-    args = from_json_bytes(request.data)
+    args = from_json_bytes(request_body())
     return aqt.mw.col.backend.graphs(search=args["search"], days=args["days"])
 
 
@@ -211,7 +559,7 @@ def congrats_info() -> bytes:
     return info.SerializeToString()
 
 
-post_handlers = dict(
+post_handlers: Dict[str, Callable[[], bytes]] = dict(
     graphData=graph_data,
     # pylint: disable=unnecessary-lambda
     i18nResources=lambda: aqt.mw.col.backend.i18n_resources(),
@@ -219,18 +567,22 @@ post_handlers = dict(
 )
 
 
-def handle_post(path: str) -> Response:
+def handle_post(path: str, body: bytes) -> Response:
     if not aqt.mw.col:
         print(f"collection not open, ignore request for {path}")
-        return flask.make_response("Collection not open", HTTPStatus.NOT_FOUND)
+        return _text_response(HTTPStatus.NOT_FOUND, "Collection not open")
 
     if path in post_handlers:
-        data = post_handlers[path]()
-        response = flask.make_response(data)
-        response.headers["Content-Type"] = "application/binary"
-        return response
-    else:
-        return flask.make_response(
-            f"Unhandled post to {path}",
-            HTTPStatus.FORBIDDEN,
+        # handlers run on a worker thread, which handles one request at a time
+        _post_request.body = body
+        try:
+            data = post_handlers[path]()
+        finally:
+            _post_request.body = b""
+        return Response(
+            HTTPStatus.OK,
+            headers={"Content-Type": "application/binary"},
+            body=data,
         )
+    else:
+        return _text_response(HTTPStatus.FORBIDDEN, f"Unhandled post to {path}")
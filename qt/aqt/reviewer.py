@@ -9,6 +9,7 @@ import html
 import json
 import re
 import unicodedata as ucd
+import urllib.parse
 from typing import Callable, List, Optional, Tuple, Union
 
 from PyQt5.QtCore import Qt
@@ -16,8 +17,12 @@ from PyQt5.QtCore import Qt
 from anki import hooks
 from anki.cards import Card
 from anki.lang import _, ngettext
+from anki.rsbackend import NotFoundError
+from anki.sound import SoundOrVideoTag
+from anki.template import TemplateRenderOutput
 from anki.utils import stripHTML
 from aqt import AnkiQt, gui_hooks
+from aqt.mediasrv import preload_files
 from aqt.qt import *
 from aqt.sound import av_player, getAudio, play_clicked_audio
 from aqt.theme import theme_manager
@@ -43,6 +48,9 @@ def replay_audio(card: Card, question_side: bool) -> None:
 class Reviewer:
     "Manage reviews.  Maintains a separate state."
 
+    # number of cards from the front of each queue to render ahead of time
+    prerenderLimit = 1
+
     def __init__(self, mw: AnkiQt) -> None:
         self.mw = mw
         self.web = mw.web
@@ -205,6 +213,54 @@ class Reviewer:
         self.mw.web.setFocus()
         # user hook
         gui_hooks.reviewer_did_show_question(c)
+        # once the question has been drawn, prepare the cards likely to follow
+        self.mw.progress.timer(100, self._prerenderUpcomingCards, False)
+
+    def _prerenderUpcomingCards(self) -> None:
+        """Render the cards likely to come next while the user is looking at
+        this one. The output is kept in the collection's render cache, which
+        is keyed on modification times, so a card that changes in the
+        meantime is rendered again when it is shown."""
+        if self.mw.state != "review" or not self.card:
+            return
+        outputs = []
+        for cid in self.mw.col.sched.upcoming_card_ids(self.prerenderLimit):
+            if cid == self.card.id:
+                continue
+            try:
+                card = self.mw.col.getCard(cid)
+            except NotFoundError:
+                # removed since the queue was built
+                continue
+            outputs.append((card.note_type()["id"], card.render_output()))
+        self._preloadMedia(outputs)
+
+    def _preloadMedia(self, outputs: List[Tuple[int, TemplateRenderOutput]]) -> None:
+        """Read the media of upcoming cards in the background, so it comes
+        from memory rather than disk when shown, and have the webview fetch
+        their images."""
+        images = self.mw.col.media.files_in_notes(
+            (
+                (mid, output.question_text + output.answer_text)
+                for mid, output in outputs
+            ),
+            rendered=True,
+        )
+        sounds = [
+            tag.filename
+            for mid, output in outputs
+            for tag in output.question_av_tags + output.answer_av_tags
+            if isinstance(tag, SoundOrVideoTag)
+        ]
+        if not images and not sounds:
+            return
+
+        media_dir = self.mw.col.media.dir()
+        fnames = images + sounds
+        self.mw.taskman.run_in_background(lambda: preload_files(media_dir, fnames))
+        if images:
+            urls = [urllib.parse.quote(fname) for fname in images]
+            self.web.eval("_preloadImages(%s);" % json.dumps(urls))
 
     def autoplay(self, card: Card) -> bool:
         print("use card.autoplay() instead of reviewer.autoplay(card)")
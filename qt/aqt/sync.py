@@ -176,6 +176,7 @@ def on_full_sync_timer(mw: aqt.main.AnkiQt) -> None:
 
 
 def full_download(mw: aqt.main.AnkiQt, on_done: Callable[[], None]) -> None:
+    mw.waitForBackup()
     mw.col.close_for_full_sync()
 
     def on_timer():
@@ -204,6 +205,7 @@ def full_download(mw: aqt.main.AnkiQt, on_done: Callable[[], None]) -> None:
 
 
 def full_upload(mw: aqt.main.AnkiQt, on_done: Callable[[], None]) -> None:
+    mw.waitForBackup()
     mw.col.close_for_full_sync()
 
     def on_timer():
@@ -28,6 +28,8 @@ install_requires = [
     "jsonschema",
     # "pyaudio", # https://anki.tenderapp.com/discussions/add-ons/44009-problems-with-code-completion
     # "pyqtwebengine", # https://github.com/ankitects/anki/pull/530 - Set to checks.yml install and import anki wheels
+    # no longer used by the media server; kept for this release, as
+    # add-ons may import them
     "flask",
     "flask_cors",
     "waitress",
@@ -0,0 +1,95 @@
+import asyncio
+import os
+from http import HTTPStatus
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from aqt.mediasrv import (
+    Request,
+    _byte_range,
+    _etag_matches,
+    _file_response,
+    _RangeNotSatisfiable,
+)
+
+
+def test_byte_range():
+    # open and closed ranges
+    assert _byte_range("bytes=0-99", 1000) == (0, 99)
+    assert _byte_range("bytes=500-", 1000) == (500, 999)
+    # the end is clamped to the file size
+    assert _byte_range("bytes=900-2000", 1000) == (900, 999)
+    # suffix ranges
+    assert _byte_range("bytes=-100", 1000) == (900, 999)
+    assert _byte_range("bytes=-2000", 1000) == (0, 999)
+    # multiple ranges and invalid headers are ignored, so the whole file is sent
+    assert _byte_range("bytes=0-1,5-6", 1000) is None
+    assert _byte_range("items=0-1", 1000) is None
+    assert _byte_range("bytes=5-1", 1000) is None
+    assert _byte_range("bytes=a-b", 1000) is None
+    # ranges past the end can't be satisfied
+    with pytest.raises(_RangeNotSatisfiable):
+        _byte_range("bytes=1000-", 1000)
+    with pytest.raises(_RangeNotSatisfiable):
+        _byte_range("bytes=-0", 1000)
+    with pytest.raises(_RangeNotSatisfiable):
+        _byte_range("bytes=-5", 0)
+
+
+def test_etag_matches():
+    assert _etag_matches('"abc"', '"abc"')
+    assert _etag_matches('"x", W/"abc"', '"abc"')
+    assert _etag_matches("*", '"abc"')
+    assert not _etag_matches('"x"', '"abc"')
+    assert not _etag_matches(None, '"abc"')
+
+
+def get(path, **headers):
+    request = Request(
+        method="GET", path=path, headers=headers, body=b"", keep_alive=False
+    )
+    response = asyncio.run(_file_response(request, path, os.stat(path)))
+    if response.file:
+        response.file.seek(response.offset)
+        body = response.file.read(response.count)
+        response.file.close()
+    else:
+        body = response.body
+    return response, body
+
+
+def test_file_response():
+    with TemporaryDirectory() as dir:
+        path = os.path.join(dir, "file.txt")
+        with open(path, "wb") as file:
+            file.write(b"0123456789")
+
+        response, body = get(path)
+        assert response.status == HTTPStatus.OK
+        assert body == b"0123456789"
+        etag = response.headers["ETag"]
+
+        # unchanged files are not sent again
+        response, body = get(path, **{"if-none-match": etag})
+        assert response.status == HTTPStatus.NOT_MODIFIED
+        assert body == b""
+
+        response, body = get(path, range="bytes=2-4")
+        assert response.status == HTTPStatus.PARTIAL_CONTENT
+        assert response.headers["Content-Range"] == "bytes 2-4/10"
+        assert body == b"234"
+
+        response, body = get(path, range="bytes=-3")
+        assert body == b"789"
+
+        response, body = get(path, range="bytes=20-")
+        assert response.status == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response.headers["Content-Range"] == "bytes */10"
+
+        # the range is only used if the file still matches If-Range
+        response, body = get(path, range="bytes=2-4", **{"if-range": etag})
+        assert body == b"234"
+        response, body = get(path, range="bytes=2-4", **{"if-range": '"old"'})
+        assert response.status == HTTPStatus.OK
+        assert body == b"0123456789"
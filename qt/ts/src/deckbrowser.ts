@@ -4,7 +4,15 @@
 $(init);
 
 function init() {
-    $("tr.deck").draggable({
+    setupDeckRows($("tr.deck"));
+    $("tr.top-level-drag-row").droppable({
+        drop: handleDropEvent,
+        hoverClass: "drag-hover",
+    });
+}
+
+function setupDeckRows(rows) {
+    rows.draggable({
         scroll: false,
 
         // can't use "helper: 'clone'" because of a bug in jQuery 1.5
@@ -14,11 +22,7 @@ function init() {
         delay: 200,
         opacity: 0.7,
     });
-    $("tr.deck").droppable({
-        drop: handleDropEvent,
-        hoverClass: "drag-hover",
-    });
-    $("tr.top-level-drag-row").droppable({
+    rows.droppable({
         drop: handleDropEvent,
         hoverClass: "drag-hover",
     });
@@ -30,3 +34,21 @@ function handleDropEvent(event, ui) {
 
     pycmd("drag:" + draggedDeckId + "," + ontoDeckId);
 }
+
+// replace the provided [deck id, row html] rows in place
+function updateDeckRows(rows: [number, string][]) {
+    for (const [deckId, html] of rows) {
+        const row = $(html);
+        $(document.getElementById(String(deckId))).replaceWith(row);
+        setupDeckRows(row);
+    }
+}
+
+function updateDeckTree(html: string) {
+    $("#decktree").html(html);
+    init();
+}
+
+function updateStats(html: string) {
+    $("#studiedToday").html(html);
+}
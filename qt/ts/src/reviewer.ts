@@ -61,6 +61,17 @@ function _updateQA(html, fadeTime, onupdate, onshown) {
     });
 }
 
+// images of upcoming cards, kept so they stay in the cache until shown
+let _preloadedImages: HTMLImageElement[] = [];
+
+function _preloadImages(urls: string[]) {
+    _preloadedImages = urls.map((url) => {
+        const img = new Image();
+        img.src = url;
+        return img;
+    });
+}
+
 function _showQuestion(q, bodyclass) {
     _updateQA(
         q,
@@ -34,6 +34,7 @@ use crate::{
     sched::timespan::{answer_button_time, time_span},
     search::SortMode,
     stats::studied_today,
+    storage::backup_collection,
     sync::{
         get_remote_sync_meta, sync_abort, sync_login, FullSyncProgress, NormalSyncProgress,
         SyncActionRequired, SyncAuth, SyncMeta, SyncOutput, SyncStage,
@@ -54,6 +55,7 @@ use slog::warn;
 use std::collections::{HashMap, HashSet};
 use std::convert::TryFrom;
 use std::{
+    path::Path,
     result,
     sync::{Arc, Mutex},
 };
@@ -294,6 +296,33 @@ impl BackendService for Backend {
         })
     }
 
+    fn render_existing_cards(
+        &self,
+        input: pb::RenderExistingCardsIn,
+    ) -> BackendResult<pb::RenderExistingCardsOut> {
+        let cids: Vec<_> = input.card_ids.into_iter().map(CardID).collect();
+        self.with_col(|col| {
+            let cards = col
+                .render_existing_cards(&cids, input.browser)?
+                .into_iter()
+                .map(|(ntid, output)| match output {
+                    Ok(output) => Ok(pb::RenderedExistingCard {
+                        notetype_id: ntid.0,
+                        output: Some(output.into()),
+                        template_error: String::new(),
+                    }),
+                    Err(err @ AnkiError::TemplateError { .. }) => Ok(pb::RenderedExistingCard {
+                        notetype_id: ntid.0,
+                        output: None,
+                        template_error: err.localized_description(&self.i18n),
+                    }),
+                    Err(err) => Err(err),
+                })
+                .collect::<Result<_>>()?;
+            Ok(pb::RenderExistingCardsOut { cards })
+        })
+    }
+
     fn render_uncommitted_card(
         &self,
         input: pb::RenderUncommittedCardIn,
@@ -834,6 +863,14 @@ impl BackendService for Backend {
         })
     }
 
+    fn add_notes(&self, input: pb::AddNotesIn) -> BackendResult<Empty> {
+        self.with_col(|col| {
+            let mut notes: Vec<Note> = input.notes.into_iter().map(Into::into).collect();
+            col.add_notes(&mut notes, DeckID(input.deck_id), input.generate_cards)
+                .map(Into::into)
+        })
+    }
+
     fn update_note(&self, input: pb::Note) -> BackendResult<Empty> {
         self.with_col(|col| {
             let mut note: Note = input.into();
@@ -1049,6 +1086,20 @@ impl BackendService for Backend {
         })
     }
 
+    fn add_media_file_from_path(
+        &self,
+        input: pb::AddMediaFileFromPathIn,
+    ) -> BackendResult<pb::String> {
+        self.with_col(|col| {
+            let mgr = MediaManager::new(&col.media_folder, &col.media_db)?;
+            let mut ctx = mgr.dbctx();
+            Ok(mgr
+                .add_file_from_path(&mut ctx, &input.desired_name, Path::new(&input.path))?
+                .to_string()
+                .into())
+        })
+    }
+
     fn empty_trash(&self, _input: Empty) -> BackendResult<Empty> {
         let mut handler = self.new_progress_handler();
         let progress_fn =
@@ -1115,6 +1166,17 @@ impl BackendService for Backend {
     // collection
     //-------------------------------------------------------------------
 
+    fn backup_collection(&self, input: pb::String) -> BackendResult<Empty> {
+        // the copy is made with its own connection, so the collection
+        // lock is only held while the path is looked up
+        let col_path = self.with_col(|col| Ok(col.col_path.clone()))?;
+        backup_collection(&col_path, Path::new(&input.val)).map(Into::into)
+    }
+
+    fn get_content_change_count(&self, _input: Empty) -> BackendResult<pb::UInt32> {
+        self.with_col(|col| Ok(col.storage.content_changes().into()))
+    }
+
     fn check_database(&self, _input: pb::Empty) -> BackendResult<pb::CheckDatabaseOut> {
         let mut handler = self.new_progress_handler();
         let progress_fn = move |progress, throttle| {
@@ -1809,6 +1871,8 @@ fn sort_kind_from_pb(kind: i32) -> SortKind {
             BuiltinSortKind::CardInterval => SK::CardInterval,
             BuiltinSortKind::CardDeck => SK::CardDeck,
             BuiltinSortKind::CardTemplate => SK::CardTemplate,
+            BuiltinSortKind::CardQuestion => SK::CardQuestion,
+            BuiltinSortKind::CardAnswer => SK::CardAnswer,
         },
         _ => SortKind::NoteCreation,
     }
@@ -6,12 +6,18 @@ use crate::i18n::I18n;
 use crate::log::Logger;
 use crate::types::Usn;
 use crate::{
+    card::CardID,
     decks::{Deck, DeckID},
     notetype::{NoteType, NoteTypeID},
+    search::RenderedSortText,
     storage::SqliteStorage,
     undo::UndoManager,
 };
-use std::{collections::HashMap, path::PathBuf, sync::Arc};
+use std::{
+    collections::HashMap,
+    path::{Path, PathBuf},
+    sync::Arc,
+};
 
 pub fn open_collection<P: Into<PathBuf>>(
     path: P,
@@ -50,6 +56,7 @@ pub struct CollectionState {
     pub(crate) undo: UndoManager,
     pub(crate) notetype_cache: HashMap<NoteTypeID, Arc<NoteType>>,
     pub(crate) deck_cache: HashMap<DeckID, Arc<Deck>>,
+    pub(crate) rendered_sort_texts: HashMap<CardID, RenderedSortText>,
 }
 
 pub struct Collection {
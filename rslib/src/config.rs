@@ -295,6 +295,10 @@ pub enum SortKind {
     CardDeck,
     #[serde(rename = "template")]
     CardTemplate,
+    #[serde(rename = "question")]
+    CardQuestion,
+    #[serde(rename = "answer")]
+    CardAnswer,
 }
 
 impl Default for SortKind {
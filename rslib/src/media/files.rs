@@ -158,6 +158,36 @@ pub fn add_data_to_folder_uniquely<'a, P>(
 ) -> io::Result<Cow<'a, str>>
 where
     P: AsRef<Path>,
+{
+    add_to_folder_uniquely(folder, desired_name, sha1, |path| fs::write(path, data))
+}
+
+/// Like add_data_to_folder_uniquely(), but copies the contents of an existing
+/// file instead of holding them in memory. The copy is done by the OS, which
+/// may clone the file instead of copying it on filesystems that support it.
+pub fn add_file_to_folder_uniquely<'a, P>(
+    folder: P,
+    desired_name: &'a str,
+    src: &Path,
+    sha1: [u8; 20],
+) -> io::Result<Cow<'a, str>>
+where
+    P: AsRef<Path>,
+{
+    add_to_folder_uniquely(folder, desired_name, sha1, |path| {
+        fs::copy(src, path).map(|_| ())
+    })
+}
+
+fn add_to_folder_uniquely<'a, P, F>(
+    folder: P,
+    desired_name: &'a str,
+    sha1: [u8; 20],
+    write: F,
+) -> io::Result<Cow<'a, str>>
+where
+    P: AsRef<Path>,
+    F: FnOnce(&Path) -> io::Result<()>,
 {
     let normalized_name = normalize_filename(desired_name);
 
@@ -166,7 +196,7 @@ where
     let existing_file_hash = existing_file_sha1(&target_path)?;
     if existing_file_hash.is_none() {
         // no file with that name exists yet
-        fs::write(&target_path, data)?;
+        write(&target_path)?;
         return Ok(normalized_name);
     }
 
@@ -179,7 +209,7 @@ where
     let hashed_name = add_hash_suffix_to_file_stem(normalized_name.as_ref(), &sha1);
     target_path.set_file_name(&hashed_name);
 
-    fs::write(&target_path, data)?;
+    write(&target_path)?;
     Ok(hashed_name.into())
 }
 
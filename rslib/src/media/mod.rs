@@ -3,11 +3,15 @@
 
 use crate::err::Result;
 use crate::media::database::{open_or_create, MediaDatabaseContext, MediaEntry};
-use crate::media::files::{add_data_to_folder_uniquely, mtime_as_i64, remove_files, sha1_of_data};
+use crate::media::files::{
+    add_data_to_folder_uniquely, add_file_to_folder_uniquely, mtime_as_i64, remove_files,
+    sha1_of_data, sha1_of_file,
+};
 use crate::media::sync::{MediaSyncProgress, MediaSyncer};
 use rusqlite::Connection;
 use slog::Logger;
 use std::borrow::Cow;
+use std::io;
 use std::path::{Path, PathBuf};
 
 pub mod changetracker;
@@ -40,19 +44,46 @@ impl MediaManager {
     /// appended to the name.
     ///
     /// Also notes the file in the media database.
-    #[allow(clippy::match_like_matches_macro)]
     pub fn add_file<'a>(
         &self,
         ctx: &mut MediaDatabaseContext,
         desired_name: &'a str,
         data: &[u8],
     ) -> Result<Cow<'a, str>> {
+        let data_hash = sha1_of_data(data);
+        self.add_file_inner(ctx, data_hash, |folder| {
+            add_data_to_folder_uniquely(folder, desired_name, data, data_hash)
+        })
+    }
+
+    /// Like add_file(), but hashes and copies the file at src in a streaming
+    /// fashion, so it is never held in memory in full.
+    pub fn add_file_from_path<'a>(
+        &self,
+        ctx: &mut MediaDatabaseContext,
+        desired_name: &'a str,
+        src: &Path,
+    ) -> Result<Cow<'a, str>> {
+        let data_hash = sha1_of_file(src)?;
+        self.add_file_inner(ctx, data_hash, |folder| {
+            add_file_to_folder_uniquely(folder, desired_name, src, data_hash)
+        })
+    }
+
+    #[allow(clippy::match_like_matches_macro)]
+    fn add_file_inner<'a, F>(
+        &self,
+        ctx: &mut MediaDatabaseContext,
+        data_hash: [u8; 20],
+        add_to_folder: F,
+    ) -> Result<Cow<'a, str>>
+    where
+        F: FnOnce(&Path) -> io::Result<Cow<'a, str>>,
+    {
         let pre_add_folder_mtime = mtime_as_i64(&self.media_folder)?;
 
         // add file to folder
-        let data_hash = sha1_of_data(data);
-        let chosen_fname =
-            add_data_to_folder_uniquely(&self.media_folder, desired_name, data, data_hash)?;
+        let chosen_fname = add_to_folder(&self.media_folder)?;
         let file_mtime = mtime_as_i64(self.media_folder.join(chosen_fname.as_ref()))?;
         let post_add_folder_mtime = mtime_as_i64(&self.media_folder)?;
 
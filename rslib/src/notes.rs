@@ -270,6 +270,41 @@ impl Collection {
         self.generate_cards_for_new_note(ctx, note, did)
     }
 
+    /// Add or replace multiple notes in a single transaction. Notes with
+    /// a non-zero ID keep it, and the provided mtime and usn are preserved,
+    /// so this is suitable for importing. If generate_cards is true, cards
+    /// are generated for each note as it is added.
+    pub fn add_notes(
+        &mut self,
+        notes: &mut [Note],
+        did: DeckID,
+        generate_cards: bool,
+    ) -> Result<()> {
+        self.transact(None, |col| {
+            let usn = col.usn()?;
+            let norm = col.normalize_note_text();
+            for (ntid, group) in &notes.iter_mut().group_by(|note| note.notetype_id) {
+                let nt = col
+                    .get_notetype(ntid)?
+                    .ok_or_else(|| AnkiError::invalid_input("missing note type"))?;
+                let ctx = CardGenContext::new(&nt, usn);
+                for note in group {
+                    col.canonify_note_tags(note, usn)?;
+                    note.prepare_for_update(&nt, norm)?;
+                    if note.id.0 == 0 {
+                        col.storage.add_note(note)?;
+                    } else {
+                        col.storage.add_or_update_note(note)?;
+                    }
+                    if generate_cards {
+                        col.generate_cards_for_new_note(&ctx, note, did)?;
+                    }
+                }
+            }
+            Ok(())
+        })
+    }
+
     pub fn update_note(&mut self, note: &mut Note) -> Result<()> {
         if let Some(existing_note) = self.storage.get_note(note.id)? {
             if &existing_note == note {
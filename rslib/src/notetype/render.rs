@@ -1,7 +1,7 @@
 // Copyright: Ankitects Pty Ltd and contributors
 // License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
-use super::{CardTemplate, NoteType, NoteTypeKind};
+use super::{CardTemplate, NoteType, NoteTypeID, NoteTypeKind};
 use crate::{
     card::{Card, CardID},
     collection::Collection,
@@ -10,7 +10,7 @@ use crate::{
     notes::{Note, NoteID},
     template::{field_is_empty, render_card, ParsedTemplate, RenderedNode},
 };
-use std::{borrow::Cow, collections::HashMap};
+use std::{borrow::Cow, collections::HashMap, sync::Arc};
 
 pub struct RenderCardOutput {
     pub qnodes: Vec<RenderedNode>,
@@ -20,6 +20,28 @@ pub struct RenderCardOutput {
 impl Collection {
     /// Render an existing card saved in the database.
     pub fn render_existing_card(&mut self, cid: CardID, browser: bool) -> Result<RenderCardOutput> {
+        let (card, note, nt) = self.card_note_and_notetype(cid)?;
+        self.render_existing_card_inner(&note, &card, &nt, browser)
+    }
+
+    /// Render multiple existing cards, returning each card's notetype id
+    /// alongside its output. Template errors are returned per card, so
+    /// a single broken template does not abort the whole batch.
+    pub fn render_existing_cards(
+        &mut self,
+        cids: &[CardID],
+        browser: bool,
+    ) -> Result<Vec<(NoteTypeID, Result<RenderCardOutput>)>> {
+        cids.iter()
+            .map(|&cid| {
+                let (card, note, nt) = self.card_note_and_notetype(cid)?;
+                let output = self.render_existing_card_inner(&note, &card, &nt, browser);
+                Ok((nt.id, output))
+            })
+            .collect()
+    }
+
+    fn card_note_and_notetype(&mut self, cid: CardID) -> Result<(Card, Note, Arc<NoteType>)> {
         let card = self
             .storage
             .get_card(cid)?
@@ -31,13 +53,23 @@ impl Collection {
         let nt = self
             .get_notetype(note.notetype_id)?
             .ok_or_else(|| AnkiError::invalid_input("no such notetype"))?;
+        Ok((card, note, nt))
+    }
+
+    fn render_existing_card_inner(
+        &mut self,
+        note: &Note,
+        card: &Card,
+        nt: &NoteType,
+        browser: bool,
+    ) -> Result<RenderCardOutput> {
         let template = match nt.config.kind() {
             NoteTypeKind::Normal => nt.templates.get(card.template_idx as usize),
             NoteTypeKind::Cloze => nt.templates.get(0),
         }
         .ok_or_else(|| AnkiError::invalid_input("missing template"))?;
 
-        self.render_card_inner(&note, &card, &nt, template, browser)
+        self.render_card_inner(note, card, nt, template, browser)
     }
 
     /// Render a card that may not yet have been added.
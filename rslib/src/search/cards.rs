@@ -6,9 +6,35 @@ use super::{
     sqlwriter::{RequiredTable, SqlWriter},
 };
 use crate::{
-    card::CardID, card::CardType, collection::Collection, config::SortKind, err::Result,
+    card::CardID,
+    card::CardType,
+    collection::Collection,
+    config::SortKind,
+    err::{AnkiError, Result},
+    notetype::NoteTypeID,
     search::parser::parse,
+    template::RenderedNode,
+    text::{strip_av_tags, strip_html},
+    timestamp::TimestampSecs,
 };
+use std::collections::HashMap;
+
+/// Searches that match more cards than this are sorted on the sort field
+/// when a question or answer sort is selected, as rendering every card
+/// would take too long.
+const MAX_RENDERED_SORT_CARDS: usize = 20_000;
+
+/// Once this many cards have cached sort text, the cache is emptied.
+const MAX_CACHED_SORT_TEXTS: usize = 50_000;
+
+/// The text a card's question and answer are sorted on, and the card, note
+/// and notetype modification times it was rendered with.
+#[derive(Debug)]
+pub(crate) struct RenderedSortText {
+    mtimes: (TimestampSecs, TimestampSecs, TimestampSecs),
+    question: String,
+    answer: String,
+}
 
 #[derive(Debug, PartialEq, Clone)]
 pub enum SortMode {
@@ -50,15 +76,29 @@ impl SortKind {
             | SortKind::CardEase
             | SortKind::CardLapses
             | SortKind::CardInterval
-            | SortKind::CardDeck => RequiredTable::Cards,
+            | SortKind::CardDeck
+            | SortKind::CardQuestion
+            | SortKind::CardAnswer => RequiredTable::Cards,
         }
     }
+
+    /// True if cards are sorted on their rendered text, which can't be
+    /// expressed in SQL.
+    fn sorts_on_rendered_text(self) -> bool {
+        matches!(self, SortKind::CardQuestion | SortKind::CardAnswer)
+    }
 }
 
 impl Collection {
     pub fn search_cards(&mut self, search: &str, mut mode: SortMode) -> Result<Vec<CardID>> {
-        let top_node = Node::Group(parse(search)?);
         self.resolve_config_sort(&mut mode);
+        if let SortMode::Builtin { kind, reverse } = mode {
+            if kind.sorts_on_rendered_text() {
+                return self.search_cards_by_rendered_text(search, kind, reverse);
+            }
+        }
+
+        let top_node = Node::Group(parse(search)?);
         let writer = SqlWriter::new(self);
 
         let (mut sql, args) = writer.build_cards_query(&top_node, mode.required_table())?;
@@ -92,6 +132,13 @@ impl Collection {
     /// Place the matched card ids into a temporary 'search_cids' table
     /// instead of returning them. Use clear_searched_cards() to remove it.
     pub(crate) fn search_cards_into_table(&mut self, search: &str, mode: SortMode) -> Result<()> {
+        if let SortMode::Builtin { kind, .. } = mode {
+            if kind.sorts_on_rendered_text() {
+                let cids = self.search_cards(search, mode)?;
+                return self.storage.set_search_table_to_card_ids(&cids);
+            }
+        }
+
         let top_node = Node::Group(parse(search)?);
         let writer = SqlWriter::new(self);
 
@@ -106,6 +153,109 @@ impl Collection {
         Ok(())
     }
 
+    /// Sort matching cards on the text of their question or answer, as
+    /// shown in the browser. The text is cached between searches, so a card
+    /// is only rendered again after it, its note or its notetype change.
+    fn search_cards_by_rendered_text(
+        &mut self,
+        search: &str,
+        kind: SortKind,
+        reverse: bool,
+    ) -> Result<Vec<CardID>> {
+        let top_node = Node::Group(parse(search)?);
+        let writer = SqlWriter::new(self);
+        let (sql, args) = writer.build_cards_query(&top_node, RequiredTable::Cards)?;
+        let sql = format!(
+            "select c.id, c.mod, n.mod, n.mid from cards c, notes n \
+             where c.nid = n.id and c.id in ({})",
+            sql
+        );
+        let cards: Vec<(CardID, TimestampSecs, TimestampSecs, NoteTypeID)> = self
+            .storage
+            .db
+            .prepare(&sql)?
+            .query_map(&args, |row| {
+                Ok((row.get(0)?, row.get(1)?, row.get(2)?, row.get(3)?))
+            })?
+            .collect::<std::result::Result<_, _>>()?;
+
+        if cards.len() > MAX_RENDERED_SORT_CARDS {
+            return self.search_cards(
+                search,
+                SortMode::Builtin {
+                    kind: SortKind::NoteField,
+                    reverse,
+                },
+            );
+        }
+        if self.state.rendered_sort_texts.len() > MAX_CACHED_SORT_TEXTS {
+            self.state.rendered_sort_texts.clear();
+        }
+
+        let mut notetype_mtimes = HashMap::new();
+        let mut keyed = Vec::with_capacity(cards.len());
+        for (cid, card_mtime, note_mtime, ntid) in cards {
+            let notetype_mtime = match notetype_mtimes.get(&ntid) {
+                Some(&mtime) => mtime,
+                None => {
+                    let mtime = self
+                        .get_notetype(ntid)?
+                        .map(|nt| nt.mtime_secs)
+                        .unwrap_or_default();
+                    notetype_mtimes.insert(ntid, mtime);
+                    mtime
+                }
+            };
+            let mtimes = (card_mtime, note_mtime, notetype_mtime);
+            let text = match self.state.rendered_sort_texts.remove(&cid) {
+                Some(text) if text.mtimes == mtimes => text,
+                _ => self.rendered_sort_text_for_card(cid, mtimes)?,
+            };
+            let key = if kind == SortKind::CardQuestion {
+                text.question.clone()
+            } else {
+                text.answer.clone()
+            };
+            self.state.rendered_sort_texts.insert(cid, text);
+            keyed.push((key, cid));
+        }
+
+        keyed.sort_unstable();
+        if reverse {
+            keyed.reverse();
+        }
+        Ok(keyed.into_iter().map(|(_, cid)| cid).collect())
+    }
+
+    fn rendered_sort_text_for_card(
+        &mut self,
+        cid: CardID,
+        mtimes: (TimestampSecs, TimestampSecs, TimestampSecs),
+    ) -> Result<RenderedSortText> {
+        let (question, answer) = match self.render_existing_card(cid, true) {
+            Ok(output) => {
+                let question = rendered_sort_text(&output.qnodes);
+                let answer = rendered_sort_text(&output.anodes);
+                // like the browser column, leave out the question if the
+                // answer repeats it
+                let answer = if answer.starts_with(&question) {
+                    answer[question.len()..].trim_start().to_string()
+                } else {
+                    answer
+                };
+                (question, answer)
+            }
+            // cards with broken templates sort first
+            Err(AnkiError::TemplateError { .. }) => (String::new(), String::new()),
+            Err(e) => return Err(e),
+        };
+        Ok(RenderedSortText {
+            mtimes,
+            question,
+            answer,
+        })
+    }
+
     /// If the sort mode is based on a config setting, look it up.
     fn resolve_config_sort(&self, mode: &mut SortMode) {
         if mode == &SortMode::FromConfig {
@@ -141,6 +291,8 @@ fn write_order(sql: &mut String, kind: SortKind, reverse: bool) -> Result<()> {
             // need to fall back on ord 0 for cloze cards
             "(select pos from sort_order where ntid = n.mid and ord = 0)) asc"
         ),
+        // sorted after the search; see search_cards_by_rendered_text()
+        SortKind::CardQuestion | SortKind::CardAnswer => "",
     };
     if order.is_empty() {
         return Ok(());
@@ -158,6 +310,20 @@ fn write_order(sql: &mut String, kind: SortKind, reverse: bool) -> Result<()> {
     Ok(())
 }
 
+/// The rendered text as a single line without formatting or media, lowercased
+/// so that sorting ignores case.
+fn rendered_sort_text(nodes: &[RenderedNode]) -> String {
+    let mut html = String::new();
+    for node in nodes {
+        match node {
+            RenderedNode::Text { text } => html.push_str(text),
+            RenderedNode::Replacement { current_text, .. } => html.push_str(current_text),
+        }
+    }
+    let text = strip_html(&strip_av_tags(&html)).to_lowercase();
+    text.split_whitespace().collect::<Vec<_>>().join(" ")
+}
+
 fn needs_aux_sort_table(kind: SortKind) -> bool {
     use SortKind::*;
     matches!(kind, CardDeck | NoteType | CardTemplate)
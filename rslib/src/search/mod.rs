@@ -3,4 +3,5 @@ mod notes;
 mod parser;
 mod sqlwriter;
 
+pub(crate) use cards::RenderedSortText;
 pub use cards::SortMode;
@@ -74,6 +74,7 @@ impl super::SqliteStorage {
     }
 
     pub(crate) fn update_card(&self, card: &Card) -> Result<()> {
+        self.mark_content_changed();
         let mut stmt = self.db.prepare_cached(include_str!("update_card.sql"))?;
         stmt.execute(params![
             card.note_id,
@@ -99,6 +100,7 @@ impl super::SqliteStorage {
     }
 
     pub(crate) fn add_card(&self, card: &mut Card) -> Result<()> {
+        self.mark_content_changed();
         let now = TimestampMillis::now().0;
         let mut stmt = self.db.prepare_cached(include_str!("add_card.sql"))?;
         stmt.execute(params![
@@ -127,6 +129,7 @@ impl super::SqliteStorage {
 
     /// Add or update card, using the provided ID. Used when syncing.
     pub(crate) fn add_or_update_card(&self, card: &Card) -> Result<()> {
+        self.mark_content_changed();
         let mut stmt = self.db.prepare_cached(include_str!("add_or_update.sql"))?;
         stmt.execute(params![
             card.id,
@@ -153,6 +156,7 @@ impl super::SqliteStorage {
     }
 
     pub(crate) fn remove_card(&self, cid: CardID) -> Result<()> {
+        self.mark_content_changed();
         self.db
             .prepare_cached("delete from cards where id = ?")?
             .execute(&[cid])?;
@@ -186,6 +190,7 @@ impl super::SqliteStorage {
     }
 
     pub(crate) fn delete_orphaned_cards(&self) -> Result<usize> {
+        self.mark_content_changed();
         self.db
             .prepare("delete from cards where nid not in (select id from notes)")?
             .execute(NO_PARAMS)
@@ -15,7 +15,7 @@ mod sync_check;
 mod tag;
 mod upgrades;
 
-pub(crate) use sqlite::SqliteStorage;
+pub(crate) use sqlite::{backup_collection, SqliteStorage};
 
 use std::fmt::Write;
 
@@ -45,6 +45,7 @@ impl super::SqliteStorage {
 
     /// Caller must call note.prepare_for_update() prior to calling this.
     pub(crate) fn update_note(&self, note: &Note) -> Result<()> {
+        self.mark_content_changed();
         assert!(note.id.0 != 0);
         let mut stmt = self.db.prepare_cached(include_str!("update.sql"))?;
         stmt.execute(params![
@@ -62,6 +63,7 @@ impl super::SqliteStorage {
     }
 
     pub(crate) fn add_note(&self, note: &mut Note) -> Result<()> {
+        self.mark_content_changed();
         assert!(note.id.0 == 0);
         let mut stmt = self.db.prepare_cached(include_str!("add.sql"))?;
         stmt.execute(params![
@@ -81,6 +83,7 @@ impl super::SqliteStorage {
 
     /// Add or update the provided note, preserving ID. Used by the syncing code.
     pub(crate) fn add_or_update_note(&self, note: &Note) -> Result<()> {
+        self.mark_content_changed();
         let mut stmt = self.db.prepare_cached(include_str!("add_or_update.sql"))?;
         stmt.execute(params![
             note.id,
@@ -97,6 +100,7 @@ impl super::SqliteStorage {
     }
 
     pub(crate) fn remove_note(&self, nid: NoteID) -> Result<()> {
+        self.mark_content_changed();
         self.db
             .prepare_cached("delete from notes where id = ?")?
             .execute(&[nid])?;
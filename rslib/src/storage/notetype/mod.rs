@@ -118,6 +118,7 @@ impl SqliteStorage {
         ntid: NoteTypeID,
         fields: &[NoteField],
     ) -> Result<()> {
+        self.mark_content_changed();
         self.db
             .prepare_cached("delete from fields where ntid=?")?
             .execute(&[ntid])?;
@@ -170,6 +171,7 @@ impl SqliteStorage {
         ntid: NoteTypeID,
         templates: &[CardTemplate],
     ) -> Result<()> {
+        self.mark_content_changed();
         self.db
             .prepare_cached("delete from templates where ntid=?")?
             .execute(&[ntid])?;
@@ -194,6 +196,7 @@ impl SqliteStorage {
 
     pub(crate) fn update_notetype_config(&self, nt: &NoteType) -> Result<()> {
         assert!(nt.id.0 != 0);
+        self.mark_content_changed();
         let mut stmt = self
             .db
             .prepare_cached(include_str!("update_notetype_core.sql"))?;
@@ -206,6 +209,7 @@ impl SqliteStorage {
 
     pub(crate) fn add_new_notetype(&self, nt: &mut NoteType) -> Result<()> {
         assert!(nt.id.0 == 0);
+        self.mark_content_changed();
 
         let mut stmt = self.db.prepare_cached(include_str!("add_notetype.sql"))?;
         let mut config_bytes = vec![];
@@ -227,6 +231,7 @@ impl SqliteStorage {
 
     /// Used for syncing.
     pub(crate) fn add_or_update_notetype(&self, nt: &NoteType) -> Result<()> {
+        self.mark_content_changed();
         let mut stmt = self.db.prepare_cached(include_str!("add_or_update.sql"))?;
         let mut config_bytes = vec![];
         nt.config.encode(&mut config_bytes)?;
@@ -243,6 +248,7 @@ impl SqliteStorage {
         ntid: NoteTypeID,
         ords: &[u32],
     ) -> Result<()> {
+        self.mark_content_changed();
         let mut stmt = self
             .db
             .prepare(include_str!("delete_cards_for_template.sql"))?;
@@ -253,6 +259,7 @@ impl SqliteStorage {
     }
 
     pub(crate) fn remove_notetype(&self, ntid: NoteTypeID) -> Result<()> {
+        self.mark_content_changed();
         self.db
             .prepare_cached("delete from cards where nid in (select id from notes where mid=?)")?
             .execute(&[ntid])?;
@@ -277,6 +284,7 @@ impl SqliteStorage {
         ntid: NoteTypeID,
         changes: &[(u32, u32)],
     ) -> Result<()> {
+        self.mark_content_changed();
         let case_clauses: Vec<_> = changes
             .iter()
             .map(|(old, new)| format!("when {} then {}", old, new))
@@ -404,6 +412,7 @@ and ord in ",
         &self,
         notetypes: HashMap<NoteTypeID, NoteTypeSchema11>,
     ) -> Result<()> {
+        self.mark_content_changed();
         let json = serde_json::to_string(&notetypes)?;
         self.db.execute("update col set models = ?", &[json])?;
         Ok(())
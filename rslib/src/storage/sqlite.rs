@@ -7,13 +7,20 @@ use crate::err::{AnkiError, DBErrorKind};
 use crate::timestamp::{TimestampMillis, TimestampSecs};
 use crate::{i18n::I18n, sched::cutoff::v1_creation_date, text::without_combining};
 use regex::Regex;
-use rusqlite::{functions::FunctionFlags, params, Connection, NO_PARAMS};
+use rusqlite::{
+    backup::Backup, functions::FunctionFlags, params, Connection, OpenFlags, NO_PARAMS,
+};
 use std::cmp::Ordering;
-use std::{borrow::Cow, path::Path, sync::Arc};
+use std::{borrow::Cow, cell::Cell, path::Path, sync::Arc, time::Duration};
 use unicase::UniCase;
 
 use super::upgrades::{SCHEMA_MAX_VERSION, SCHEMA_MIN_VERSION, SCHEMA_STARTING_VERSION};
 
+/// 4MB with the default page size.
+const BACKUP_PAGES_PER_STEP: i32 = 1024;
+/// Time to sleep between backup steps, so the disk isn't saturated.
+const BACKUP_STEP_PAUSE: Duration = Duration::from_millis(50);
+
 fn unicase_compare(s1: &str, s2: &str) -> Ordering {
     UniCase::new(s1).cmp(&UniCase::new(s2))
 }
@@ -26,6 +33,28 @@ fn unicase_compare(s1: &str, s2: &str) -> Ordering {
 pub struct SqliteStorage {
     // currently crate-visible for dbproxy
     pub(crate) db: Connection,
+    /// Incremented each time cards, notes or notetypes are written, so
+    /// callers can tell whether rendered cards may have changed.
+    content_changes: Cell<u32>,
+}
+
+/// Copy the last committed state of the collection at col_path into a new
+/// file at path, with SQLite's online backup API. A separate read-only
+/// connection is used, so this does not need the collection's lock, and
+/// uncommitted changes in its open transaction are not included.
+pub(crate) fn backup_collection(col_path: &Path, path: &Path) -> Result<()> {
+    let src = Connection::open_with_flags(col_path, OpenFlags::SQLITE_OPEN_READ_ONLY)?;
+    // holding a read transaction for the whole copy pins the snapshot, so
+    // commits made in the meantime don't restart the backup
+    src.execute_batch("begin")?;
+    src.query_row("select count() from sqlite_master", NO_PARAMS, |_| Ok(()))?;
+    let mut dest = Connection::open(path)?;
+    Backup::new(&src, &mut dest)?.run_to_completion(
+        BACKUP_PAGES_PER_STEP,
+        BACKUP_STEP_PAUSE,
+        None,
+    )?;
+    Ok(())
 }
 
 fn open_or_create_collection_db(path: &Path) -> Result<Connection> {
@@ -37,7 +66,9 @@ fn open_or_create_collection_db(path: &Path) -> Result<Connection> {
 
     db.busy_timeout(std::time::Duration::from_secs(0))?;
 
-    db.pragma_update(None, "locking_mode", &"exclusive")?;
+    // normal locking, so that backups can read the file with their
+    // own connection while the collection is open
+    db.pragma_update(None, "locking_mode", &"normal")?;
     db.pragma_update(None, "page_size", &4096)?;
     db.pragma_update(None, "cache_size", &(-40 * 1024))?;
     db.pragma_update(None, "legacy_file_format", &false)?;
@@ -177,7 +208,10 @@ impl SqliteStorage {
             )?;
         }
 
-        let storage = Self { db };
+        let storage = Self {
+            db,
+            content_changes: Cell::new(0),
+        };
 
         if create || upgrade {
             storage.upgrade_to_latest_schema(ver, server)?;
@@ -228,6 +262,18 @@ impl SqliteStorage {
         Ok(())
     }
 
+    // Change tracking
+    //////////////////////////////////////////
+
+    pub(crate) fn content_changes(&self) -> u32 {
+        self.content_changes.get()
+    }
+
+    pub(super) fn mark_content_changed(&self) {
+        self.content_changes
+            .set(self.content_changes.get().wrapping_add(1));
+    }
+
     // Savepoints
     //////////////////////////////////////////
     //